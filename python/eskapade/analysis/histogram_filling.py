@@ -19,6 +19,8 @@ modification, are permitted according to the terms listed in the file
 LICENSE.
 """
 
+import datetime
+
 import numpy as np
 import pandas as pd
 
@@ -189,6 +191,25 @@ class HistogramFillerBase(Link):
 
         return StatusCode.Success
 
+    def checkpoint_state(self):
+        """Get the state accumulated over the datasets processed so far.
+
+        Used to checkpoint long iterations, see ReadToDf.
+
+        :returns: accumulated state by attribute name
+        :rtype: dict
+        """
+        # columns and data types are completed at the first execute
+        return {'_hists': self._hists, 'columns': self.columns, 'var_dtype': self.var_dtype}
+
+    def restore_checkpoint_state(self, state):
+        """Restore the state accumulated over datasets from a checkpoint.
+
+        :param dict state: accumulated state by attribute name
+        """
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
     def process_and_store(self):
         """Store (and possibly process) histogram objects."""
         ds = process_manager.service(DataStore)
@@ -269,7 +290,7 @@ class HistogramFillerBase(Link):
         for col in self.dt_cols:
             self.logger.debug('Converting column "{col}" of type "{type}" to nanosec.',
                               col=col, type=self.var_dtype[col])
-            idf[col] = df[col].apply(to_ns)
+            idf[col] = series_to_ns(df[col])
         return idf
 
     def fill_histogram(self, idf, c):
@@ -342,6 +363,31 @@ def to_ns(x):
     return 0
 
 
+def series_to_ns(series):
+    """Convert column of timestamps to nanoseconds (integers).
+
+    Vectorized version of to_ns(), with missing values converted to 0.
+    Datetime columns are converted directly, other columns are parsed at once
+    with pd.to_datetime. Only if that fails, e.g. for mixed values, the
+    values are converted one by one with to_ns().
+
+    :param pd.Series series: column to be converted
+    :returns: converted column
+    :rtype: pd.Series
+    """
+    if not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        try:
+            parsed = pd.to_datetime(series)
+        except (TypeError, ValueError, OverflowError):
+            parsed = None
+        if parsed is None or not pd.api.types.is_datetime64_any_dtype(parsed.dtype):
+            return series.apply(to_ns)
+        series = parsed
+    # (utc) nanoseconds, with NaT as the smallest integer
+    ns = series.array.asi8
+    return pd.Series(np.where(series.isna().values, 0, ns), index=series.index)
+
+
 def to_str(val):
     """Convert input to (array of) string(s).
 
@@ -446,6 +492,66 @@ def value_to_bin_index(val, **kwargs):
     return val
 
 
+def bin_spec_to_ns(spec):
+    """Convert timestamp or time interval in bin specifications to nanoseconds.
+
+    Other values, e.g. numbers, are returned unchanged.
+
+    :param spec: bin_width, bin_offset or bin edge value
+    :returns: converted value
+    """
+    if isinstance(spec, (np.datetime64, datetime.date)):
+        return pd.Timestamp(spec).value
+    if isinstance(spec, (np.timedelta64, datetime.timedelta)):
+        return pd.Timedelta(spec).value
+    return spec
+
+
+def series_to_bin_index(series, **kwargs):
+    """Convert column to bin indices.
+
+    Vectorized version of value_to_bin_index(), for numeric columns and
+    timestamp columns converted to nanoseconds.  Besides bin_width and
+    bin_offset, bin_edges can be used for the binning.  As in
+    Histogram.value_to_bin_label(), values outside the bin edges are put in
+    the first or last bin.  Missing and infinite values get no bin index.
+
+    :param pd.Series series: column to be converted
+    :param bin_width: bin_width value needed to convert column to an integer bin index
+    :param bin_offset: bin_offset value needed to convert column to an integer bin index
+    :param list bin_edges: bin edges, used instead of bin_width and bin_offset
+    :returns: column with bin indices, of type Int64 if there are missing values, else int64
+    :rtype: pd.Series
+    """
+    values = series.to_numpy()
+    if values.dtype.kind not in 'iu':
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    elif values.dtype.kind == 'u':
+        values = values.astype(np.int64)
+    valid = np.isfinite(values)
+
+    if kwargs.get('bin_edges') is not None:
+        bin_edges = np.asarray([bin_spec_to_ns(e) for e in kwargs['bin_edges']])
+        index = np.searchsorted(bin_edges, values, side='right') - 1
+        index = np.clip(index, 0, len(bin_edges) - 2)
+    else:
+        bin_width = bin_spec_to_ns(kwargs.get('bin_width', 1))
+        bin_offset = bin_spec_to_ns(kwargs.get('bin_offset', 0))
+        if values.dtype.kind == 'i' and all(isinstance(v, (int, np.integer)) for v in (bin_width, bin_offset)):
+            # exact for large integers, e.g. nanoseconds
+            index = np.floor_divide(values - bin_offset, bin_width)
+        else:
+            with np.errstate(invalid='ignore'):
+                index = np.floor((values - bin_offset) / bin_width)
+            valid &= np.isfinite(index)
+            index = np.where(valid, index, 0)
+    index = index.astype(np.int64)
+
+    if valid.all():
+        return pd.Series(index, index=series.index)
+    return pd.Series(pd.arrays.IntegerArray(index, ~valid), index=series.index)
+
+
 def value_to_bin_center(val, **kwargs):
     """Convert value to bin center.
 
@@ -2,6 +2,7 @@ from eskapade.analysis.links.apply_func_to_df import ApplyFuncToDf
 from eskapade.analysis.links.apply_selection_to_df import ApplySelectionToDf
 from eskapade.analysis.links.basic_generator import BasicGenerator
 from eskapade.analysis.links.df_concatenator import DfConcatenator
+from eskapade.analysis.links.df_memory_optimizer import DfMemoryOptimizer
 from eskapade.analysis.links.df_merger import DfMerger
 from eskapade.analysis.links.random_sample_splitter import RandomSampleSplitter
 from eskapade.analysis.links.read_to_df import ReadToDf
@@ -15,6 +16,7 @@ __all__ = ['ApplyFuncToDf',
            'ApplySelectionToDf',
            'BasicGenerator',
            'DfConcatenator',
+           'DfMemoryOptimizer',
            'DfMerger',
            'RandomSampleSplitter',
            'ReadToDf',
@@ -0,0 +1,256 @@
+"""Project: Eskapade - A python-based package for data analysis.
+
+Class: DfMemoryOptimizer
+
+Created: 2026/10/18
+
+Description:
+    Algorithm to reduce the memory usage of pandas dataframes, by
+    downcasting numeric columns and converting low-cardinality string
+    columns to categories
+
+Authors:
+    KPMG Advanced Analytics & Big Data team, Amstelveen, The Netherlands
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted according to the terms listed in the file
+LICENSE.
+"""
+
+import numpy as np
+import pandas as pd
+
+from eskapade import DataStore
+from eskapade import Link
+from eskapade import StatusCode
+from eskapade import process_manager
+from eskapade.logger import Logger
+
+logger = Logger()
+
+# candidate types of downcast integer columns, from small to large
+SIGNED_INT_TYPES = [np.dtype(t) for t in ('int8', 'int16', 'int32', 'int64')]
+UNSIGNED_INT_TYPES = [np.dtype(t) for t in ('uint8', 'uint16', 'uint32', 'uint64')]
+
+
+def smallest_int_type(vmin, vmax):
+    """Get the smallest integer type that holds a range of values.
+
+    Unsigned types are used for non-negative values.
+
+    :param int vmin: minimum value
+    :param int vmax: maximum value
+    :returns: integer type
+    :rtype: np.dtype
+    """
+    candidates = UNSIGNED_INT_TYPES if vmin >= 0 else SIGNED_INT_TYPES
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= vmin and vmax <= info.max:
+            return dtype
+    return np.dtype('int64')
+
+
+def is_exact_float32(values):
+    """Check if float values are represented exactly by float32.
+
+    :param np.ndarray values: float values
+    :rtype: bool
+    """
+    with np.errstate(over='ignore', invalid='ignore'):
+        return np.array_equal(values.astype(np.float32).astype(values.dtype), values, equal_nan=True)
+
+
+class MemoryOptimizer(object):
+    """Reduce the memory usage of DataFrames, keeping the same schema for consecutive DataFrames.
+
+    The target dtype of each column is determined from the first DataFrame:
+
+    * integer columns get the smallest integer type that holds their range;
+    * float64 columns become float32 if this does not change any value;
+    * string columns with at most max_category_fraction unique values per row become string_dtype.
+
+    Later DataFrames, e.g. chunks of a file, are converted to the same dtypes, such that their concatenation
+    keeps the dtypes. Only if a later DataFrame does not fit, the dtype is widened, with a warning:
+    integer types are enlarged, float32 reverts to float64, and categories are appended.
+    NB appending categories changes the categorical dtype; use string_dtype 'string[pyarrow]' for a dtype
+    that does not depend on the values.
+    """
+
+    def __init__(self, downcast=True, max_category_fraction=0.5, string_dtype='category', columns=None):
+        """Initialize memory optimizer.
+
+        :param bool downcast: downcast numeric columns. Default is True.
+        :param float max_category_fraction: maximum ratio of unique values and rows of a string column
+            that is converted. Default is 0.5. None disables the conversion of string columns.
+        :param str string_dtype: dtype of converted string columns, 'category' (default) or 'string[pyarrow]'.
+        :param list columns: columns to optimize, default is all columns
+        """
+        self.downcast = downcast
+        self.max_category_fraction = max_category_fraction
+        self.string_dtype = string_dtype
+        self.columns = columns
+        self.schema = None
+
+    def infer_schema(self, df):
+        """Determine the dtypes of the optimized columns.
+
+        :param pd.DataFrame df: input DataFrame
+        :returns: dictionary with target dtype per column
+        :rtype: dict
+        """
+        schema = {}
+        for col in (self.columns if self.columns is not None else df.columns):
+            dtype = self._infer_dtype(df[col])
+            if dtype is not None and dtype != df[col].dtype:
+                schema[col] = dtype
+        return schema
+
+    def _infer_dtype(self, series):
+        """Determine the optimized dtype of a column, None if it cannot be optimized."""
+        dtype = series.dtype
+        if len(series.index) == 0:
+            return None
+        if self.downcast and pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+            return smallest_int_type(series.min(), series.max())
+        if self.downcast and dtype == np.float64:
+            return np.dtype(np.float32) if is_exact_float32(series.values) else None
+        if self.max_category_fraction is not None and dtype == object and \
+                pd.api.types.infer_dtype(series, skipna=True) == 'string':
+            n_unique = series.nunique()
+            if n_unique > self.max_category_fraction * len(series.index):
+                return None
+            if self.string_dtype == 'category':
+                return pd.CategoricalDtype(np.sort(series.dropna().unique()))
+            return pd.api.types.pandas_dtype(self.string_dtype)
+        return None
+
+    def optimize(self, df):
+        """Convert DataFrame to the optimized dtypes.
+
+        The schema is inferred from the first DataFrame, and applied to all DataFrames.
+
+        :param pd.DataFrame df: input DataFrame
+        :returns: tuple of the converted DataFrame and a Series with the bytes saved per column
+        :rtype: tuple
+        """
+        if self.schema is None:
+            self.schema = self.infer_schema(df)
+            logger.debug('Optimized dtypes: {schema}', schema=self.schema)
+
+        before = df.memory_usage(index=False, deep=True)
+        converted = {}
+        for col, dtype in list(self.schema.items()):
+            if col not in df.columns:
+                continue
+            dtype = self._fit_dtype(df[col], dtype)
+            if dtype != self.schema[col]:
+                self.schema[col] = dtype
+            if dtype != df[col].dtype:
+                converted[col] = df[col].astype(dtype)
+        if converted:
+            # the input DataFrame is left unchanged
+            df = df.copy(deep=False)
+            for col, values in converted.items():
+                df[col] = values
+        after = df.memory_usage(index=False, deep=True)
+        return df, (before - after).rename('bytes_saved')
+
+    @staticmethod
+    def _fit_dtype(series, dtype):
+        """Widen target dtype if needed to hold the values of the column."""
+        if len(series.index) == 0:
+            return dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            new = pd.Index(series.dropna().unique()).difference(dtype.categories)
+            if len(new):
+                logger.debug('Adding {n:d} categories to column "{col}".', n=len(new), col=series.name)
+                return pd.CategoricalDtype(dtype.categories.append(new.sort_values()))
+        elif isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+            if not pd.api.types.is_integer_dtype(series.dtype):
+                logger.warning('Column "{col}" is no longer integer; not downcasting it.', col=series.name)
+                return series.dtype
+            fit = smallest_int_type(series.min(), series.max())
+            if not np.can_cast(fit, dtype):
+                widened = np.promote_types(dtype, fit)
+                widened = widened if widened.kind in 'iu' else np.dtype('int64')
+                logger.warning('Values of column "{col}" do not fit in {dtype}; widening to {widened}.',
+                               col=series.name, dtype=dtype, widened=widened)
+                return widened
+        elif dtype == np.float32 and series.dtype == np.float64 and not is_exact_float32(series.values):
+            logger.warning('Values of column "{col}" do not fit in float32; keeping float64.', col=series.name)
+            return series.dtype
+        return dtype
+
+
+def log_memory_savings(bytes_saved, log=logger):
+    """Log the bytes saved per column.
+
+    :param pd.Series bytes_saved: bytes saved per column
+    :param log: logger to use
+    """
+    for col, n_bytes in bytes_saved[bytes_saved != 0].items():
+        log.debug('Column "{col}": saved {n:d} bytes.', col=col, n=int(n_bytes))
+    log.info('Memory optimization saved {n:d} bytes in total.', n=int(bytes_saved.sum()))
+
+
+class DfMemoryOptimizer(Link):
+    """Reduce the memory usage of a pandas dataframe.
+
+    Numeric columns are downcast to the smallest type that holds their values, and low-cardinality
+    string columns are converted to categories. When looping over chunks, all chunks get the same dtypes.
+    """
+
+    def __init__(self, **kwargs):
+        """Initialize link instance.
+
+        :param str name: name of link
+        :param str read_key: key of the input dataframe in the data store
+        :param str store_key: key of the output dataframe in the data store. Default is read_key.
+        :param list columns: columns to optimize, default is all columns
+        :param bool downcast: downcast numeric columns. Default is True.
+        :param float max_category_fraction: maximum ratio of unique values and rows of a string column
+            that is converted. Default is 0.5. None disables the conversion of string columns.
+        :param str string_dtype: dtype of converted string columns, 'category' (default) or 'string[pyarrow]'.
+        :param str savings_key: key of a series with the bytes saved per column in the data store.
+            Default is 'memory_savings_' + store_key.
+        """
+        Link.__init__(self, kwargs.pop('name', 'DfMemoryOptimizer'))
+
+        # process and register all relevant kwargs. kwargs are added as attributes of the link.
+        # second arg is default value for an attribute. key is popped from kwargs.
+        self._process_kwargs(kwargs, read_key='', store_key=None, columns=None, downcast=True,
+                             max_category_fraction=0.5, string_dtype='category', savings_key=None)
+        self.check_extra_kwargs(kwargs)
+
+        self._optimizer = None
+
+    def initialize(self):
+        """Initialize the link."""
+        assert isinstance(self.read_key, str) and self.read_key, 'read_key has not been set.'
+        if self.store_key is None:
+            self.store_key = self.read_key
+        if self.savings_key is None:
+            self.savings_key = 'memory_savings_' + self.store_key
+        assert self.string_dtype in ('category', 'string[pyarrow]'), \
+            'string_dtype needs to be "category" or "string[pyarrow]".'
+
+        self._optimizer = MemoryOptimizer(self.downcast, self.max_category_fraction, self.string_dtype, self.columns)
+
+        return StatusCode.Success
+
+    def execute(self):
+        """Execute the link.
+
+        Convert the dataframe to the optimized dtypes.
+        """
+        ds = process_manager.service(DataStore)
+        assert self.read_key in ds, 'key "{}" not in data store.'.format(self.read_key)
+
+        df, bytes_saved = self._optimizer.optimize(ds[self.read_key])
+        log_memory_savings(bytes_saved, self.logger)
+
+        ds[self.store_key] = df
+        ds[self.savings_key] = bytes_saved
+
+        return StatusCode.Success
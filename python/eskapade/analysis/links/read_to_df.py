@@ -15,9 +15,24 @@ modification, are permitted according to the terms listed in the file
 LICENSE.
 """
 
+import ast
 import copy
 import glob
+import hashlib
+import heapq
+import io
+import json
+import operator
 import os
+import pickle
+import queue
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from urllib.parse import unquote
 
 import numpy as np
 import pandas as pd
@@ -30,11 +45,15 @@ from eskapade import process_manager
 from eskapade.logger import Logger
 from eskapade import AmbiguousFileType
 from eskapade import UnhandledFileType
+from escore import ForkStore
+from eskapade.analysis.links.df_memory_optimizer import MemoryOptimizer, log_memory_savings
+from eskapade.analysis.links.write_from_df import COLUMNAR_METADATA, FEATHER_METADATA, NULL_PARTITION, \
+    PARTITION_METADATA, check_columnar_labels, numpy_columnar_writer
 
 logger = Logger()
 
 
-def numpy_reader(path, restore_index, file_type):
+def numpy_reader(path, restore_index, file_type, chunksize=None):
     """Read from numpy file from disk to DataFrame,
     restoring the metadata
 
@@ -42,14 +61,16 @@ def numpy_reader(path, restore_index, file_type):
     :param bool restore_index: store index in DataFrame
         Default is True
     :param str file_type: the file type used {'npy', 'npz'}
+    :param int chunksize: if set, return an iterator over chunks of chunksize rows.
+        The values of an npz file are memory-mapped if possible, see NpzChunkReader.
 
     :raises AmbiguousFileType: when we can't determine whether the
         file type is npy or npz
     :raises UnhandledFileType: generic catch for when the type logic
         fails to exclude case
 
-    :returns df: the DF read from disk
-    :rtype: pd.DataFrame
+    :returns df: the DF read from disk, or a chunk reader
+    :rtype: pd.DataFrame or ChunkReader
     """
     f_ext = os.path.splitext(path)[1].strip('.')
 
@@ -61,6 +82,12 @@ def numpy_reader(path, restore_index, file_type):
     else:
         raise UnhandledFileType(path, f_ext, file_type)
 
+    if chunksize is not None:
+        if f_ext == 'npz':
+            return NpzChunkReader(path, chunksize, restore_index)
+        # an npy file holds a pickled object array, which cannot be memory-mapped
+        return FrameChunkReader(numpy_reader(path, restore_index, f_ext), chunksize)
+
     npy_file = np.load(path)
     if f_ext == 'npz':
         logger.info('Reading npz file {}'.format(path))
@@ -74,7 +101,8 @@ def numpy_reader(path, restore_index, file_type):
             df.index = npy_file['index']
             logger.debug('Restored index')
         elif 'index' in npy_file.files:
-            df['restored_index'] = npy_file['index']
+            # first column, as in the other formats
+            df.insert(0, 'restored_index', npy_file['index'])
         else:
             pass
 
@@ -100,21 +128,98 @@ def numpy_reader(path, restore_index, file_type):
     return df
 
 
-def feather_reader(path, restore_index):
+def feather_reader(path, restore_index, chunksize=None, memory_map=False):
     """Read from feather file from disk to DataFrame,
     restoring the metadata
 
     :param str path: target file location
     :param bool restore_index: store index in DataFrame
         Default is True
+    :param int chunksize: if set, return an iterator over chunks of chunksize rows
+    :param bool memory_map: memory-map the file, such that numeric columns without missing
+        values are not copied. NB these columns are read-only. Default is False.
 
-    :returns df: the DF read from disk
-    :rtype: pd.DataFrame
+    :returns df: the DF read from disk, or a chunk reader
+    :rtype: pd.DataFrame or FeatherChunkReader
     """
-    import feather
+    if chunksize is not None:
+        return FeatherChunkReader(path, chunksize, restore_index, memory_map)
+    from pyarrow import feather
     logger.debug('Reading feather file {}'.format(path))
-    df = feather.read_dataframe(path)
+    return feather_table_to_pandas(feather.read_table(path, memory_map=memory_map), restore_index, memory_map)
+
 
+def feather_table_to_pandas(table, restore_index, zero_copy=False):
+    """Convert (a slice of) a feather table to DataFrame, restoring the metadata
+
+    :param pyarrow.Table table: table read from feather file
+    :param bool restore_index: store index in DataFrame
+    :param bool zero_copy: put numeric columns in the DataFrame without copying, see arrow_to_pandas.
+        Default is False.
+    :returns df: the converted table
+    :rtype: pd.DataFrame
+    """
+    metadata = (table.schema.metadata or {}).get(FEATHER_METADATA)
+    df = arrow_to_pandas(table) if zero_copy else table.to_pandas()
+
+    if metadata is None:
+        # file written with dtypes in a separate column
+        return _restore_feather_dtypes_column(df, restore_index)
+
+    # restore the dtypes that Arrow does not round-trip, e.g. fixed-size bytes
+    metadata = json.loads(metadata.decode())
+    for i, dtype in enumerate(metadata['dtypes']):
+        if str(df.dtypes.iloc[i]) != dtype:
+            df[df.columns[i]] = df.iloc[:, i].astype(dtype, copy=False)
+
+    if not restore_index and metadata['store_index'] and not isinstance(df.index, pd.RangeIndex):
+        df.index.name = 'restored_index'
+        df.reset_index(inplace=True)
+
+    return df
+
+
+def arrow_to_pandas(table):
+    """Convert Arrow table to DataFrame, without copying numeric columns.
+
+    Numeric and (timezone-naive) timestamp columns without missing values
+    are put in the DataFrame as views of the Arrow buffers. The remaining
+    columns, and the index, are converted by Arrow using the pandas metadata.
+
+    :param pyarrow.Table table: input table
+    :returns: converted table
+    :rtype: pd.DataFrame
+    """
+    import pyarrow as pa
+    pandas_metadata = table.schema.pandas_metadata or {}
+    index_columns = [c for c in pandas_metadata.get('index_columns', []) if isinstance(c, str)]
+
+    views = {}
+    for name, column in zip(table.column_names, table.columns):
+        dtype = column.type
+        numeric = pa.types.is_integer(dtype) or pa.types.is_floating(dtype)
+        timestamp = pa.types.is_timestamp(dtype) and dtype.unit == 'ns' and dtype.tz is None
+        if (numeric or timestamp) and name not in index_columns and column.num_chunks == 1 and \
+                column.null_count == 0:
+            views[name] = column.chunk(0).to_numpy(zero_copy_only=True)
+
+    df = table.drop(list(views)).to_pandas(split_blocks=True)
+    if not views:
+        return df
+    columns = [name for name in table.column_names if name not in index_columns]
+    # copy=False keeps the views as separate blocks, without consolidating
+    return pd.DataFrame({name: views[name] if name in views else df[name] for name in columns},
+                        index=df.index, columns=columns, copy=False)
+
+
+def _restore_feather_dtypes_column(df, restore_index):
+    """Restore dtypes and index of DataFrame read from feather file with _dtypes column.
+
+    :param pd.DataFrame df: the DF read from disk
+    :param bool restore_index: store index in DataFrame
+    :returns df: the DF with restored dtypes
+    :rtype: pd.DataFrame
+    """
     if ('_dtypes' in df.columns.values):
         dtypes = df.loc[df['_dtypes'] != '0', '_dtypes'].values
         for i, dtype in enumerate(dtypes):
@@ -133,12 +238,1023 @@ def feather_reader(path, restore_index):
     return df
 
 
+def numpy_columnar_reader(path, restore_index, mmap_mode='r', chunksize=None):
+    """Read from columnar numpy directory from disk to DataFrame,
+    restoring the metadata
+
+    Columns of fixed-size data types are memory-mapped, and put in the
+    DataFrame without copying.
+
+    :param str path: target directory location
+    :param bool restore_index: store index in DataFrame
+        Default is True
+    :param str mmap_mode: memory-map mode of the column files, see numpy.load.
+        Default is 'r' (read-only). Use 'c' (copy-on-write) to allow in-place changes
+        of the DataFrame; None reads the columns into memory.
+    :param int chunksize: if set, return an iterator over chunks of chunksize rows,
+        which are slices of the memory-mapped columns
+
+    :returns df: the DF read from disk, or a chunk reader
+    :rtype: pd.DataFrame or FrameChunkReader
+    """
+    if chunksize is not None:
+        return FrameChunkReader(numpy_columnar_reader(path, restore_index, mmap_mode), chunksize)
+    logger.info('Reading columnar numpy directory {}'.format(path))
+    with open(os.path.join(path, COLUMNAR_METADATA)) as f:
+        metadata = json.load(f)
+
+    columns = [col['name'] for col in metadata['columns']]
+    data = {i: _load_numpy_column(path, col, mmap_mode) for i, col in enumerate(metadata['columns'])}
+    # copy=False keeps the memory-mapped arrays as separate blocks, without consolidating
+    df = pd.DataFrame(data, index=pd.RangeIndex(metadata['n_rows']), copy=False)
+    df.columns = columns
+
+    if metadata['index'] is not None:
+        index = _load_numpy_column(path, metadata['index'], mmap_mode)
+        if restore_index is True:
+            df.index = pd.Index(index, name=metadata['index']['name'])
+            logger.debug('Restored index')
+        else:
+            # first column, as in the other formats
+            df.insert(0, 'restored_index', index)
+
+    return df
+
+
+def _load_numpy_column(path, meta, mmap_mode):
+    """Load a column stored by the columnar numpy writer.
+
+    :param str path: directory location
+    :param dict meta: column metadata
+    :param str mmap_mode: memory-map mode of the column file
+    :returns: column values
+    """
+    file_path = os.path.join(path, meta['file'])
+    if meta['kind'] == 'object':
+        values = np.load(file_path, allow_pickle=True)
+        return pd.array(values, dtype=meta['dtype']) if meta['dtype'] != 'object' else values
+    values = np.load(file_path, mmap_mode=mmap_mode)
+    if meta['kind'] == 'category':
+        categories = np.load(os.path.join(path, meta['categories_file']), allow_pickle=True)
+        return pd.Categorical.from_codes(values, categories=categories, ordered=meta['ordered'])
+    elif meta['kind'] == 'datetimetz':
+        return pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(pd.api.types.pandas_dtype(meta['dtype']).tz)
+    return values
+
+
+class ChunkReader(object):
+    """Base class of iterators over chunks of a dataset.
+
+    Subclasses implement _iter_frames(), which yields DataFrames of arbitrary
+    length. These are re-sliced into chunks of exactly chunksize rows, except
+    for the last chunk, as done by the TextFileReader of pd.read_csv.
+    A default (range) index continues from chunk to chunk.
+    The chunksize may be changed during iteration.
+    """
+
+    def __init__(self, chunksize):
+        """Initialize chunk reader.
+
+        :param int chunksize: number of rows per chunk
+        """
+        self.chunksize = chunksize
+        self._frames = None
+        self._buffer = []
+        self._n_buffered = 0
+        self._n_read = 0
+
+    def _iter_frames(self):
+        """Yield DataFrames with the consecutive rows of the dataset."""
+        raise NotImplementedError('_iter_frames() not implemented for {}'.format(self.__class__.__name__))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        """Get the next chunk.
+
+        :returns: next chunk of chunksize rows, less for the last chunk
+        :rtype: pd.DataFrame
+        :raises StopIteration: when the dataset has been read
+        """
+        if self._frames is None:
+            self._frames = self._iter_frames()
+        while self._n_buffered < self.chunksize:
+            frame = next(self._frames, None)
+            if frame is None:
+                break
+            if len(frame.index) == 0:
+                continue
+            if isinstance(frame.index, pd.RangeIndex):
+                start = self._n_read + self._n_buffered
+                frame.index = pd.RangeIndex(start, start + len(frame.index))
+            self._buffer.append(frame)
+            self._n_buffered += len(frame.index)
+        if self._n_buffered == 0:
+            raise StopIteration
+
+        data = self._buffer[0] if len(self._buffer) == 1 else pd.concat(self._buffer)
+        chunk, rest = data.iloc[:self.chunksize], data.iloc[self.chunksize:]
+        self._buffer = [rest] if len(rest.index) else []
+        self._n_buffered = len(rest.index)
+        self._n_read += len(chunk.index)
+        return chunk
+
+    def get_chunk(self, size=None):
+        """Get the next chunk, of given size.
+
+        :param int size: number of rows, default is chunksize.
+        :returns: next chunk
+        :rtype: pd.DataFrame
+        """
+        if size is not None:
+            self.chunksize = size
+        return next(self)
+
+    def close(self):
+        """Close the reader."""
+        self._frames = None
+        self._buffer = []
+        self._n_buffered = 0
+
+
+class FrameChunkReader(ChunkReader):
+    """Iterate over chunks of a DataFrame that is already loaded or memory-mapped.
+
+    The chunks are slices of the input DataFrame, which are not copied.
+    """
+
+    def __init__(self, df, chunksize):
+        """Initialize chunk reader.
+
+        :param pd.DataFrame df: input DataFrame
+        :param int chunksize: number of rows per chunk
+        """
+        super().__init__(chunksize)
+        self.df = df
+
+    def _iter_frames(self):
+        """Yield slices of the DataFrame."""
+        start = 0
+        while start < len(self.df.index):
+            stop = start + self.chunksize
+            yield self.df.iloc[start:stop]
+            start = stop
+
+
+class FeatherChunkReader(ChunkReader):
+    """Iterate over chunks of a feather file.
+
+    The file is always memory-mapped, such that an uncompressed file is not loaded into memory up front.
+    Chunks are converted from zero-copy slices of the Arrow table, and copied on conversion.
+    With memory_map, numeric columns of the chunks are not copied either, and are read-only.
+    """
+
+    def __init__(self, path, chunksize, restore_index=True, memory_map=False):
+        """Open feather file.
+
+        :param str path: file location
+        :param int chunksize: number of rows per chunk
+        :param bool restore_index: restore the stored index
+        :param bool memory_map: put numeric columns in the chunks without copying. Default is False.
+        """
+        from pyarrow import feather
+        super().__init__(chunksize)
+        # only the chunks read are paged in
+        self.table = feather.read_table(path, memory_map=True)
+        self.restore_index = restore_index
+        self.memory_map = memory_map
+
+    def _iter_frames(self):
+        """Yield converted slices of the table."""
+        start = 0
+        while start < self.table.num_rows:
+            yield feather_table_to_pandas(self.table.slice(start, self.chunksize), self.restore_index,
+                                          self.memory_map)
+            start += self.chunksize
+
+
+class NpzChunkReader(ChunkReader):
+    """Iterate over chunks of an npz file written by the numpy writer.
+
+    The values are memory-mapped when stored uncompressed with a fixed-size data type.
+    Otherwise they are loaded into memory, and sliced.
+    """
+
+    def __init__(self, path, chunksize, restore_index=True):
+        """Open npz file.
+
+        :param str path: file location
+        :param int chunksize: number of rows per chunk
+        :param bool restore_index: restore the stored index
+        """
+        super().__init__(chunksize)
+        self.restore_index = restore_index
+        npz_file = np.load(path, allow_pickle=True)
+        self.columns = npz_file['columns']
+        self.dtypes = npz_file['dtypes']
+        self.index = npz_file['index'] if 'index' in npz_file.files else None
+        self.values = npz_member_memmap(path, 'values')
+        if self.values is None:
+            logger.debug('Cannot memory-map values of "{path}"; loading them into memory.', path=path)
+            self.values = npz_file['values']
+
+    def _iter_frames(self):
+        """Yield slices of the values, with restored dtypes and index."""
+        start = 0
+        while start < len(self.values):
+            stop = start + self.chunksize
+            df = pd.DataFrame(data=self.values[start:stop], columns=self.columns)
+            for col, dtype in zip(self.columns, self.dtypes):
+                df[col] = df[col].astype(dtype, copy=False)
+            if self.index is not None and self.restore_index:
+                df.index = self.index[start:stop]
+            elif self.index is not None:
+                df.insert(0, 'restored_index', self.index[start:stop])
+            yield df
+            start = stop
+
+
+def npz_member_memmap(path, name):
+    """Memory-map an array in an npz file.
+
+    Only possible for arrays that are stored uncompressed, e.g. by np.savez,
+    and that have a fixed-size data type.
+
+    :param str path: npz file location
+    :param str name: name of the array
+    :returns: memory-mapped array, None if the array cannot be memory-mapped
+    :rtype: np.memmap
+    """
+    with zipfile.ZipFile(path) as zip_file:
+        info = zip_file.getinfo(name + '.npy')
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, 'rb') as f:
+        # skip the local file header, with its variable-length file name and extra field
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = np.frombuffer(f.read(4), dtype='<u2')
+        f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else \
+            np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+    if dtype.hasobject:
+        return None
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape, order='F' if fortran_order else 'C')
+
+
+class HdfChunkReader(ChunkReader):
+    """Iterate over chunks of a DataFrame in an HDF5 file.
+
+    The chunks are read as start/stop windows, for both the fixed and the table format.
+    """
+
+    def __init__(self, path, chunksize, key=None, **kwargs):
+        """Open HDF5 file.
+
+        :param str path: file location
+        :param int chunksize: number of rows per chunk
+        :param str key: key of the DataFrame in the file; may be omitted if the file holds one DataFrame
+        :param kwargs: passed on to pd.HDFStore.select, e.g. columns
+        """
+        super().__init__(chunksize)
+        self.store = pd.HDFStore(path, mode='r')
+        if key is None:
+            keys = self.store.keys()
+            if len(keys) != 1:
+                self.store.close()
+                raise RuntimeError('Key required for HDF5 file "{}" with {:d} datasets.'.format(path, len(keys)))
+            key = keys[0]
+        self.key = key
+        self.kwargs = kwargs
+        storer = self.store.get_storer(key)
+        self.n_rows = storer.nrows if storer.is_table else hdf_fixed_nrows(storer)
+
+    def _iter_frames(self):
+        """Yield start/stop windows of the DataFrame."""
+        start = 0
+        while start < self.n_rows:
+            stop = min(start + self.chunksize, self.n_rows)
+            yield self.store.select(self.key, start=start, stop=stop, **self.kwargs)
+            start = stop
+        self.store.close()
+
+    def close(self):
+        """Close the reader and the HDF5 file."""
+        super().close()
+        self.store.close()
+
+
+def hdf_fixed_nrows(storer):
+    """Get the number of rows of a DataFrame or Series stored in HDF5 fixed format.
+
+    :param storer: pandas storer of the fixed-format dataset
+    :returns: number of rows
+    :rtype: int
+    """
+    # the row index is stored as axis1 of a DataFrame, and as index of a Series;
+    # a multi-index is stored as one array of labels per level
+    for name in ('axis1', 'axis1_label0', 'index', 'index_label0'):
+        if name in storer.group:
+            return storer.group[name].shape[0]
+    raise RuntimeError('Cannot determine the number of rows of HDF5 dataset "{}".'.format(storer.pathname))
+
+
+def hdf_reader(path, key=None, chunksize=None, **kwargs):
+    """Read DataFrame from HDF5 file
+
+    :param str path: file location
+    :param str key: key of the DataFrame in the file
+    :param int chunksize: if set, return an iterator over chunks of chunksize rows
+    :param kwargs: passed on to pd.read_hdf
+    :returns df: the DF read from disk, or a chunk reader
+    :rtype: pd.DataFrame or HdfChunkReader
+    """
+    if chunksize is not None:
+        return HdfChunkReader(path, chunksize, key, **kwargs)
+    return pd.read_hdf(path, key, **kwargs)
+
+
+def json_lines_reader(path, **kwargs):
+    """Read DataFrame from file with one JSON object per line
+
+    :param str path: file location
+    :param kwargs: passed on to pd.read_json, e.g. chunksize
+    :returns df: the DF read from disk, or a JSON reader that iterates over chunks
+    """
+    return pd.read_json(path, lines=True, **kwargs)
+
+
+def is_chunk_reader(obj):
+    """Check if object iterates over chunks of a dataset.
+
+    :param obj: object to check
+    :rtype: bool
+    """
+    return isinstance(obj, (pd.io.parsers.TextFileReader, pd.io.json._json.JsonReader, ChunkReader))
+
+
+def reader_position(reader):
+    """Get the number of bytes consumed from the file of a chunk reader.
+
+    Available for the pandas text and JSON readers, which read ahead in blocks.
+
+    :param reader: chunk reader
+    :returns: position in the file in bytes, None if unknown
+    :rtype: int
+    """
+    handle = getattr(getattr(reader, 'handles', None), 'handle', None)
+    try:
+        position = handle.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+    return position if isinstance(position, int) else None
+
+
+def file_bytes(path, byte_range=None):
+    """Get the number of bytes of a file, or of the byte range read from it.
+
+    :param str path: file location
+    :param tuple byte_range: header end, range begin and range end, default is None (whole file)
+    :rtype: int
+    """
+    if byte_range is not None:
+        header_end, begin, end = byte_range
+        return header_end + end - begin
+    return os.path.getsize(path)
+
+
+# columns of the I/O metrics of the datasets read
+IO_METRICS_COLUMNS = ['path', 'chunk', 'rows', 'bytes_read', 'parse_seconds', 'rows_per_second', 'memory_bytes']
+
+
+def io_metrics_record(path, chunk, data, bytes_read, seconds):
+    """Collect the I/O metrics of a dataset read.
+
+    :param str path: file location
+    :param int chunk: index of the chunk in the file
+    :param pd.DataFrame data: dataset read
+    :param bytes_read: number of bytes read, NaN if unknown
+    :param float seconds: parse time in seconds
+    :returns: metrics, see IO_METRICS_COLUMNS
+    :rtype: dict
+    """
+    n_rows = len(data.index)
+    return dict(path=path, chunk=chunk, rows=n_rows, bytes_read=bytes_read, parse_seconds=seconds,
+                rows_per_second=n_rows / seconds if seconds > 0 else np.nan,
+                memory_bytes=int(data.memory_usage(deep=True).sum()))
+
+
+# comparison operators supported in (parquet) filters
+FILTER_OPERATORS = {'=': operator.eq, '==': operator.eq, '!=': operator.ne,
+                    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+
+def normalize_filters(filters):
+    """Bring filters into disjunctive normal form.
+
+    Filters are given as in pyarrow: a list of (column, op, value) tuples
+    that are combined with AND, or a list of such lists that are combined with OR.
+
+    :param list filters: filters
+    :returns: list of lists of predicates
+    :rtype: list
+    """
+    if not filters:
+        return []
+    if isinstance(filters[0], tuple):
+        filters = [filters]
+    for predicate in (p for conjunction in filters for p in conjunction):
+        if len(predicate) != 3 or (predicate[1] not in FILTER_OPERATORS and predicate[1] not in ('in', 'not in')):
+            raise ValueError('Unsupported filter predicate: {}'.format(predicate))
+    return [list(conjunction) for conjunction in filters]
+
+
+def filter_columns(filters):
+    """Get the columns used in filters.
+
+    :param list filters: filters in disjunctive normal form
+    :rtype: list
+    """
+    columns = []
+    for col, _, _ in (p for conjunction in filters for p in conjunction):
+        if col not in columns:
+            columns.append(col)
+    return columns
+
+
+def filter_mask(df, filters):
+    """Evaluate filters on the rows of a DataFrame.
+
+    :param pd.DataFrame df: input data
+    :param list filters: filters in disjunctive normal form
+    :returns: boolean mask of the rows that pass the filters
+    :rtype: np.ndarray
+    """
+    mask = np.zeros(len(df.index), dtype=bool)
+    for conjunction in filters:
+        cmask = np.ones(len(df.index), dtype=bool)
+        for col, op, val in conjunction:
+            if op == 'in':
+                cmask &= df[col].isin(val).values
+            elif op == 'not in':
+                cmask &= ~df[col].isin(val).values
+            else:
+                cmask &= FILTER_OPERATORS[op](df[col], val).values
+        mask |= cmask
+    return mask
+
+
+def _predicate_may_match(vmin, vmax, null_count, op, val):
+    """Check if a predicate can hold for any value in the range [vmin, vmax].
+
+    Missing values pass the predicates != and not in, as in pandas, so these only fail
+    if the number of missing values is known to be zero.
+
+    :returns: False if no value in the range passes the predicate
+    :rtype: bool
+    """
+    try:
+        if op in ('=', '=='):
+            return vmin <= val <= vmax
+        elif op == '!=':
+            return null_count != 0 or not (vmin == vmax == val)
+        elif op == 'not in':
+            return null_count != 0 or not (vmin == vmax and vmin in val)
+        elif op == '<':
+            return vmin < val
+        elif op == '<=':
+            return vmin <= val
+        elif op == '>':
+            return vmax > val
+        elif op == '>=':
+            return vmax >= val
+        elif op == 'in':
+            return any(vmin <= v <= vmax for v in val)
+    except TypeError:
+        pass
+    return True
+
+
+def parquet_row_groups(parquet_file, filters):
+    """Select row groups of a parquet file that may hold rows passing the filters.
+
+    Based on the min/max statistics of the row groups.
+
+    :param parquet_file: pyarrow.parquet.ParquetFile
+    :param list filters: filters in disjunctive normal form
+    :returns: indices of selected row groups
+    :rtype: list
+    """
+    metadata = parquet_file.metadata
+    selected = []
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        stats = {}
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            statistics = column.statistics
+            if statistics is not None and statistics.has_min_max:
+                null_count = statistics.null_count if statistics.has_null_count else None
+                stats[column.path_in_schema] = (statistics.min, statistics.max, null_count)
+        if not filters or any(all(_predicate_may_match(*stats[col], op, val)
+                                  for col, op, val in conjunction if col in stats)
+                              for conjunction in filters):
+            selected.append(i)
+    return selected
+
+
+class ParquetChunkReader(ChunkReader):
+    """Iterate over chunks of a parquet file.
+
+    Row groups that cannot hold rows passing the filters are skipped;
+    the rows of the remaining row groups are filtered after reading.
+    """
+
+    def __init__(self, path, chunksize, columns=None, filters=None, restore_index=True):
+        """Open parquet file.
+
+        :param str path: file location
+        :param int chunksize: number of rows per chunk
+        :param list columns: columns to read, default is all
+        :param list filters: filters (column, op, value) to apply to the rows
+        :param bool restore_index: restore the stored index
+        """
+        import pyarrow.parquet as pq
+        super().__init__(chunksize)
+        self.parquet_file = pq.ParquetFile(path)
+        self.columns = columns
+        self.filters = normalize_filters(filters)
+        self.restore_index = restore_index
+        self.row_groups = parquet_row_groups(self.parquet_file, self.filters)
+        logger.debug('Reading {n:d} of {n_tot:d} row groups of "{path}".', n=len(self.row_groups),
+                     n_tot=self.parquet_file.metadata.num_row_groups, path=path)
+
+    def _iter_frames(self):
+        """Yield filtered record batches of the selected row groups."""
+        if not self.row_groups:
+            return
+        extra = [c for c in filter_columns(self.filters) if self.columns is not None and c not in self.columns]
+        columns = self.columns + extra if self.columns is not None else None
+        # row numbers in the file of the first rows of the selected row groups, and in the batches read
+        metadata = self.parquet_file.metadata
+        group_starts = np.cumsum([0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)])
+        group_starts = group_starts[self.row_groups]
+        batch_starts = np.cumsum([0] + [metadata.row_group(i).num_rows for i in self.row_groups[:-1]])
+        position = 0
+        for batch in self.parquet_file.iter_batches(batch_size=self.chunksize, row_groups=self.row_groups,
+                                                    columns=columns, use_pandas_metadata=self.restore_index):
+            df = batch.to_pandas()
+            if self.filters and isinstance(df.index, pd.RangeIndex):
+                # default index: keep the row numbers in the file of the rows that pass
+                rows = np.arange(position, position + len(df.index))
+                group = np.searchsorted(batch_starts, rows, side='right') - 1
+                df.index = group_starts[group] + rows - batch_starts[group]
+            position += len(df.index)
+            if self.filters:
+                df = df[filter_mask(df, self.filters)]
+            if extra:
+                df = df.drop(extra, axis=1)
+            if not self.restore_index:
+                df = _unrestore_index(df)
+            yield df
+
+
+def parquet_reader(path, restore_index, columns=None, usecols=None, filters=None, chunksize=None, **kwargs):
+    """Read from parquet file from disk to DataFrame
+
+    :param str path: target file location
+    :param bool restore_index: restore the stored index in DataFrame
+        Default is True
+    :param list columns: columns to read (projection), default is all columns
+    :param list usecols: alias of columns
+    :param list filters: row filters (column, op, value), combined with AND, or a list of such lists,
+        combined with OR. Row groups that do not pass the filters, according to their statistics,
+        are not read.
+    :param int chunksize: if set, return an iterator over chunks of chunksize rows
+    :param kwargs: passed on to pyarrow.parquet.read_table
+
+    :returns df: the DF read from disk, or a chunk reader
+    :rtype: pd.DataFrame or ParquetChunkReader
+    """
+    import pyarrow.parquet as pq
+    columns = columns if columns is not None else usecols
+    columns = list(columns) if columns is not None else None
+    if chunksize is not None:
+        return ParquetChunkReader(path, chunksize, columns, filters, restore_index)
+
+    logger.debug('Reading parquet file {}'.format(path))
+    if filters:
+        # read in one go, keeping the row numbers of the rows that pass the filters
+        reader = ParquetChunkReader(path, max(pq.ParquetFile(path).metadata.num_rows, 1), columns, filters,
+                                    restore_index)
+        frames = list(reader._iter_frames())
+        return pd.concat(frames) if len(frames) > 1 else frames[0] if frames else \
+            pq.read_schema(path).empty_table().to_pandas().loc[:, columns or slice(None)]
+    table = pq.read_table(path, columns=columns, use_pandas_metadata=restore_index, **kwargs)
+    df = table.to_pandas(split_blocks=True)
+    return df if restore_index else _unrestore_index(df)
+
+
+# pandas text parser options without meaning for the arrow engine
+ARROW_CSV_IGNORED = ('engine', 'low_memory', 'memory_map', 'float_precision')
+
+
+def arrow_type(dtype):
+    """Get the Arrow type to parse a column of a (pandas) dtype, None if there is no direct equivalent.
+
+    :param dtype: pandas or numpy dtype
+    :rtype: pyarrow.DataType
+    """
+    import pyarrow as pa
+    try:
+        dtype = pd.api.types.pandas_dtype(dtype)
+    except TypeError:
+        return None
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and isinstance(getattr(dtype, 'numpy_dtype', None),
+                                                                          np.dtype):
+        # nullable integer and boolean dtypes
+        dtype = dtype.numpy_dtype
+    elif not isinstance(dtype, np.dtype):
+        return None
+    if dtype.kind in 'biuf':
+        return pa.from_numpy_dtype(dtype)
+    if dtype.kind in 'OSU':
+        return pa.string()
+    if dtype.kind == 'M':
+        return pa.timestamp('ns')
+    return None
+
+
+class ArrowCsvChunkReader(ChunkReader):
+    """Read a delimited text file with the multi-threaded CSV reader of Arrow.
+
+    The pandas text parser options are mapped onto the Arrow read, parse and convert options.
+    Iterating streams the file in blocks of block_size bytes, re-sliced into chunks of chunksize rows.
+    NB when streaming, the column types are inferred from the first block; give the dtypes of columns that
+    differ further on, e.g. columns without values in the first block.
+    """
+
+    def __init__(self, path, chunksize=None, sep=',', delimiter=None, header='infer', names=None, index_col=None,
+                 usecols=None, dtype=None, parse_dates=None, skiprows=None, nrows=None, na_values=None,
+                 keep_default_na=True, true_values=None, false_values=None, quotechar='"', escapechar=None,
+                 encoding=None, block_size=None, **kwargs):
+        """Set up the Arrow options of a text file.
+
+        :param path: file location, or file object, which is read into memory
+        :param int chunksize: number of rows per chunk when iterating
+        :param int block_size: number of bytes processed at a time by Arrow. Default is Arrow's default.
+        :param kwargs: pandas text parser options, see pd.read_csv
+        """
+        import pyarrow as pa
+        from pyarrow import csv
+        super().__init__(chunksize)
+        unsupported = [k for k, v in kwargs.items() if k not in ARROW_CSV_IGNORED and v is not None]
+        if unsupported:
+            raise RuntimeError('Options not supported by the arrow engine: {}.'.format(', '.join(unsupported)))
+        delimiter = delimiter if delimiter is not None else sep
+        if not isinstance(delimiter, str) or len(delimiter) != 1:
+            raise RuntimeError('The arrow engine requires a single-character separator.')
+        if skiprows is not None and not isinstance(skiprows, int):
+            raise RuntimeError('The arrow engine only skips a number of leading rows.')
+        if isinstance(na_values, dict) or parse_dates not in (None, False) and \
+                not isinstance(parse_dates, (list, tuple)):
+            raise RuntimeError('The arrow engine requires na_values to be a list, and parse_dates a list of column '
+                               'names.')
+
+        # file objects, e.g. byte ranges, are read into memory: Arrow reads ahead in background threads
+        self.source = path if isinstance(path, str) else pa.py_buffer(path.read())
+        self.nrows = nrows
+        self.index_col = index_col if index_col is not False else None
+        self.parse_dates = list(parse_dates) if parse_dates else []
+        self.default_names = False
+
+        if header == 'infer':
+            header = 0 if names is None else None
+        skip_rows = skiprows or 0
+        read_options = dict(encoding=encoding or 'utf8', skip_rows=skip_rows)
+        if block_size is not None:
+            read_options['block_size'] = block_size
+        if header is None:
+            if names is None:
+                read_options['autogenerate_column_names'] = True
+                self.default_names = True
+            else:
+                read_options['column_names'] = list(names)
+        else:
+            read_options['skip_rows'] = skip_rows + header
+            if names is not None:
+                # the header line is replaced by the names
+                read_options.update(column_names=list(names), skip_rows_after_names=1)
+        self.read_options = csv.ReadOptions(**read_options)
+        self.parse_options = csv.ParseOptions(delimiter=delimiter, quote_char=quotechar or False,
+                                              escape_char=escapechar or False)
+
+        convert_options = dict(strings_can_be_null=True)
+        if na_values is not None:
+            na_values = [na_values] if isinstance(na_values, str) else [str(v) for v in na_values]
+            convert_options['null_values'] = (csv.ConvertOptions().null_values if keep_default_na else []) + \
+                na_values
+        elif not keep_default_na:
+            convert_options['null_values'] = []
+        for option, values in (('true_values', true_values), ('false_values', false_values)):
+            if values is not None:
+                convert_options[option] = getattr(csv.ConvertOptions(), option) + [str(v) for v in values]
+        if callable(usecols):
+            usecols = [c for c in self.column_names() if usecols(c)]
+        if usecols is not None:
+            usecols = list(usecols)
+            if any(isinstance(c, int) for c in usecols):
+                names = self.column_names()
+                usecols = [names[c] if isinstance(c, int) else c for c in usecols]
+            convert_options['include_columns'] = usecols
+        # dtypes without direct Arrow equivalent are parsed as strings and converted afterwards,
+        # as are the date columns, which are parsed by pandas like pd.read_csv does
+        self.astype = {}
+        column_types = {self._arrow_name(col): arrow_type(str) for col in self.parse_dates}
+        if dtype is not None:
+            dtypes = dtype if isinstance(dtype, dict) else {c: dtype for c in (usecols or self.column_names())}
+            for col, dt in dtypes.items():
+                pa_type = arrow_type(dt)
+                column_types[self._arrow_name(col)] = pa_type if pa_type is not None else arrow_type(str)
+                if pa_type is None or not isinstance(pd.api.types.pandas_dtype(dt), np.dtype):
+                    self.astype[self._arrow_name(col)] = dt
+        if column_types:
+            convert_options['column_types'] = column_types
+        self.convert_options = csv.ConvertOptions(**convert_options)
+
+    def _arrow_name(self, col):
+        """Get the name Arrow gives to a column, which differs for generated names."""
+        return 'f{}'.format(col) if self.default_names and isinstance(col, int) else col
+
+    def _input(self):
+        """Open the input for an Arrow read."""
+        import pyarrow as pa
+        return self.source if isinstance(self.source, str) else pa.BufferReader(self.source)
+
+    def column_names(self):
+        """Get the column names of the file, as named by Arrow."""
+        from pyarrow import csv
+        reader = csv.open_csv(self._input(), read_options=self.read_options, parse_options=self.parse_options)
+        names = reader.schema.names
+        reader.close()
+        return names
+
+    def to_pandas(self, table):
+        """Convert table read to DataFrame, applying the remaining pandas options.
+
+        Arrow types map onto the default pandas dtypes: integer columns with missing values become float,
+        strings become objects, and dates become datetime64[ns]. Columns without any value become float,
+        as with pd.read_csv.
+
+        :param table: pyarrow.Table read
+        :rtype: pd.DataFrame
+        """
+        import pyarrow as pa
+        for i, field in enumerate(table.schema):
+            if pa.types.is_null(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+        df = table.to_pandas(split_blocks=True, date_as_object=False)
+        astype = {col: dt for col, dt in self.astype.items() if col in df.columns}
+        if astype:
+            df = df.astype(astype)
+        for col in map(self._arrow_name, self.parse_dates):
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col])
+        if self.default_names:
+            df.columns = pd.RangeIndex(len(df.columns))
+        if self.index_col is not None:
+            index_col = self.index_col if isinstance(self.index_col, (list, tuple)) else [self.index_col]
+            df = df.set_index([df.columns[c] if isinstance(c, int) and not self.default_names else c
+                               for c in index_col])
+        return df
+
+    def _iter_frames(self):
+        """Yield the converted blocks of the file."""
+        import pyarrow as pa
+        from pyarrow import csv
+        reader = csv.open_csv(self._input(), read_options=self.read_options, parse_options=self.parse_options,
+                              convert_options=self.convert_options)
+        n_rows = 0
+        try:
+            for batch in reader:
+                if self.nrows is not None:
+                    batch = batch.slice(0, self.nrows - n_rows)
+                n_rows += batch.num_rows
+                yield self.to_pandas(pa.Table.from_batches([batch]))
+                if self.nrows is not None and n_rows >= self.nrows:
+                    break
+        finally:
+            reader.close()
+
+    def read(self):
+        """Read the entire file, or its first nrows rows.
+
+        :rtype: pd.DataFrame
+        """
+        from pyarrow import csv
+        if self.nrows is not None:
+            frames = list(self._iter_frames())
+            return pd.concat(frames) if len(frames) > 1 else frames[0] if frames else pd.DataFrame()
+        return self.to_pandas(csv.read_csv(self._input(), read_options=self.read_options,
+                                           parse_options=self.parse_options, convert_options=self.convert_options))
+
+
+def arrow_csv_reader(path, chunksize=None, **kwargs):
+    """Read delimited text file with the multi-threaded CSV reader of Arrow.
+
+    :param path: file location, or file object
+    :param int chunksize: if set, return an iterator over chunks of chunksize rows, streaming the file
+    :param kwargs: pandas text parser options, see ArrowCsvChunkReader
+    :returns df: the DF read from disk, or a chunk reader
+    :rtype: pd.DataFrame or ArrowCsvChunkReader
+    """
+    reader = ArrowCsvChunkReader(path, chunksize, **kwargs)
+    if chunksize is not None:
+        return reader
+    logger.debug('Reading file {} with the arrow engine'.format(path))
+    return reader.read()
+
+
+def partition_metadata(path):
+    """Get the metadata of a partitioned dataset.
+
+    :param str path: directory location
+    :returns: partition columns, column order, dtypes of the partition columns, file format and store_index
+    :rtype: dict
+    """
+    with open(os.path.join(path, PARTITION_METADATA)) as f:
+        return json.load(f)
+
+
+def partition_value(text, dtype):
+    """Parse the value of a partition column from its directory name.
+
+    :param str text: value as in the directory name, see partition_dir_name()
+    :param str dtype: dtype of the partition column
+    :returns: value of the partition column
+    """
+    if text == NULL_PARTITION:
+        return np.nan
+    text = unquote(text)
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if pd.api.types.is_bool_dtype(dtype):
+        return text == 'True'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return pd.Timestamp(text)
+    if pd.api.types.is_numeric_dtype(dtype):
+        return pd.Series([text]).astype(dtype).iloc[0]
+    return text
+
+
+def partition_files(path, metadata):
+    """Find the files of a partitioned dataset, with the values of the partition columns.
+
+    :param str path: directory location
+    :param dict metadata: metadata of the dataset, see partition_metadata()
+    :returns: DataFrame with one row per file, with its path and the values of the partition columns
+    :rtype: pd.DataFrame
+    """
+    cols = metadata['partition_cols']
+    records = []
+    for folder, dirs, files in os.walk(path):
+        dirs.sort()
+        segments = os.path.relpath(folder, path).split(os.sep)
+        if len(segments) != len(cols) or folder == path:
+            continue
+        names, texts = zip(*(s.split('=', 1) for s in segments))
+        if list(names) != cols:
+            raise RuntimeError('Unexpected partition directory "{}".'.format(folder))
+        values = [partition_value(t, metadata['dtypes'][c]) for c, t in zip(cols, texts)]
+        records += [values + [os.path.join(folder, f)] for f in sorted(files) if not f.startswith(('_', '.'))]
+    files = pd.DataFrame(records, columns=cols + ['_path'])
+    for col in cols:
+        try:
+            files[col] = files[col].astype(metadata['dtypes'][col])
+        except (TypeError, ValueError):
+            pass
+    return files
+
+
+class PartitionedChunkReader(ChunkReader):
+    """Iterate over chunks of a partitioned dataset.
+
+    The partitions that cannot hold rows passing the filters are skipped, based on the values of the
+    partition columns. The files of the remaining partitions are read with their filters on the other columns,
+    and get the partition columns back.
+    """
+
+    def __init__(self, path, chunksize, columns=None, filters=None, restore_index=True):
+        """Find the files of the partitioned dataset to read.
+
+        :param str path: directory location
+        :param int chunksize: number of rows per chunk, None reads each file at once
+        :param list columns: columns to read, default is all
+        :param list filters: filters (column, op, value) to apply to the rows
+        :param bool restore_index: restore the stored index
+        """
+        super().__init__(chunksize)
+        self.metadata = partition_metadata(path)
+        self.columns = [c for c in self.metadata['columns'] if columns is None or c in columns]
+        self.restore_index = restore_index
+        cols = self.metadata['partition_cols']
+        files = partition_files(path, self.metadata)
+
+        # per conjunction, the partitions that pass its predicates on the partition columns
+        filters = normalize_filters(filters)
+        masks = [filter_mask(files, [[p for p in conjunction if p[0] in cols]]) for conjunction in filters]
+        self.files = []
+        for i, row in enumerate(files.itertuples(index=False)):
+            if filters and not any(mask[i] for mask in masks):
+                continue
+            # predicates on the other columns of the conjunctions that hold for the partition
+            file_filters = [[p for p in conjunction if p[0] not in cols]
+                            for conjunction, mask in zip(filters, masks) if mask[i]]
+            file_filters = [] if any(not conjunction for conjunction in file_filters) else file_filters
+            self.files.append((row[-1], dict(zip(cols, row[:-1])), file_filters))
+        logger.debug('Reading {n:d} of {n_tot:d} files of partitioned dataset "{path}".', n=len(self.files),
+                     n_tot=len(files.index), path=path)
+
+    def _read_file(self, path, filters):
+        """Yield the frames of a file of the dataset, with the filters applied."""
+        file_columns = [c for c in self.columns if c not in self.metadata['partition_cols']]
+        if self.metadata['format'] == 'parquet':
+            data = parquet_reader(path, self.restore_index, columns=file_columns, filters=filters,
+                                  chunksize=self.chunksize)
+            for df in data if self.chunksize is not None else [data]:
+                yield df
+            return
+        data = feather_reader(path, self.restore_index, chunksize=self.chunksize)
+        for df in data if self.chunksize is not None else [data]:
+            if filters:
+                df = df[filter_mask(df, filters)]
+            yield df[file_columns]
+
+    def _iter_frames(self):
+        """Yield the frames of the selected files, with the partition columns added."""
+        for path, values, filters in self.files:
+            for df in self._read_file(path, filters):
+                if not self.metadata['store_index']:
+                    df = df.reset_index(drop=True)
+                for col, value in values.items():
+                    if col in self.columns:
+                        df[col] = pd.Series(value, index=df.index).astype(self.metadata['dtypes'][col])
+                yield df[self.columns]
+
+    def read(self):
+        """Read the selected files at once.
+
+        :rtype: pd.DataFrame
+        """
+        frames = list(self._iter_frames())
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(frames, ignore_index=not self.metadata['store_index'])
+
+
+def partitioned_reader(path, restore_index, columns=None, usecols=None, filters=None, chunksize=None):
+    """Read partitioned dataset from disk to DataFrame
+
+    :param str path: directory location
+    :param bool restore_index: restore the stored index in DataFrame
+        Default is True
+    :param list columns: columns to read (projection), default is all columns
+    :param list usecols: alias of columns
+    :param list filters: row filters (column, op, value), combined with AND, or a list of such lists,
+        combined with OR. Partitions that do not pass the filters on the partition columns are not read.
+    :param int chunksize: if set, return an iterator over chunks of chunksize rows
+
+    :returns df: the DF read from disk, or a chunk reader
+    :rtype: pd.DataFrame or PartitionedChunkReader
+    """
+    columns = columns if columns is not None else usecols
+    reader = PartitionedChunkReader(path, chunksize, columns, filters, restore_index)
+    if chunksize is not None:
+        return reader
+    logger.debug('Reading partitioned dataset {}'.format(path))
+    return reader.read()
+
+
+def _unrestore_index(df):
+    """Turn a stored, non-default index back into column 'restored_index'."""
+    if isinstance(df.index, pd.RangeIndex):
+        return df
+    df.index.name = 'restored_index'
+    return df.reset_index()
+
+
 all_readers = {'csv': pd.read_csv,
                'tsv': pd.read_csv,
                'xls': pd.read_excel,
                'xlsx': pd.read_excel,
                'json': pd.read_json,
-               'h5': pd.read_hdf,
+               'jsonl': json_lines_reader,
+               'ndjson': json_lines_reader,
+               'h5': hdf_reader,
+               'hdf': hdf_reader,
+               'hdf5': hdf_reader,
                'sql': pd.read_sql,
                'htm': pd.read_html,
                'html': pd.read_html,
@@ -150,7 +1266,456 @@ all_readers = {'csv': pd.read_csv,
                'npy': numpy_reader,
                'npz': numpy_reader,
                'feather': feather_reader,
-               'ft': feather_reader}
+               'ft': feather_reader,
+               'npcol': numpy_columnar_reader,
+               'parquet': parquet_reader,
+               'pq': parquet_reader,
+               'partitioned': partitioned_reader}
+
+
+# comparison operators of queries that can be pushed down into the readers
+QUERY_OPERATORS = {ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=',
+                   ast.In: 'in', ast.NotIn: 'not in'}
+REVERSED_OPERATORS = {'==': '==', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+
+def query_columns(query_set):
+    """Get the names used in queries.
+
+    :param list query_set: query expressions, see pd.DataFrame.query
+    :returns: names used in the queries, None if a query cannot be parsed, e.g. with local variables
+    :rtype: list
+    """
+    names = []
+    for query in query_set:
+        try:
+            tree = ast.parse(query, mode='eval')
+        except SyntaxError:
+            return None
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and node.id not in names:
+                names.append(node.id)
+    return names
+
+
+def query_predicates(query_set):
+    """Translate queries into filter predicates (column, op, value).
+
+    Only comparisons of a column with a constant, combined with "and" or "&", are translated;
+    other parts of the queries are skipped. As the predicates are combined with AND, all rows that pass
+    the queries pass the predicates.
+
+    :param list query_set: query expressions, see pd.DataFrame.query
+    :returns: filter predicates
+    :rtype: list
+    """
+    predicates = []
+    for query in query_set:
+        try:
+            nodes = [ast.parse(query, mode='eval').body]
+        except SyntaxError:
+            continue
+        while nodes:
+            node = nodes.pop(0)
+            if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+                nodes.extend(node.values)
+            elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitAnd):
+                nodes.extend([node.left, node.right])
+            elif isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in QUERY_OPERATORS:
+                predicate = _compare_predicate(node.left, QUERY_OPERATORS[type(node.ops[0])], node.comparators[0])
+                if predicate is not None:
+                    predicates.append(predicate)
+    return predicates
+
+
+def _compare_predicate(left, op, right):
+    """Translate comparison of column and constant to predicate, None if not possible."""
+    if isinstance(right, ast.Name) and op in REVERSED_OPERATORS:
+        left, op, right = right, REVERSED_OPERATORS[op], left
+    if not isinstance(left, ast.Name):
+        return None
+    try:
+        value = ast.literal_eval(right)
+    except ValueError:
+        return None
+    if isinstance(value, (list, tuple, set)):
+        # comparing with a list tests membership, as in pd.DataFrame.query
+        op = {'==': 'in', '!=': 'not in'}.get(op, op)
+        if op not in ('in', 'not in'):
+            return None
+    elif op in ('in', 'not in'):
+        return None
+    return left.id, op, value
+
+
+def parser_columns(kwargs):
+    """Get the names of the columns a text parser needs, besides the selected columns.
+
+    These are the index columns and the columns parsed as dates.
+
+    :param dict kwargs: text parser options
+    :returns: column names, None if one of them is given by position
+    :rtype: list
+    """
+    names = []
+    specs = [kwargs.get('index_col'), kwargs.get('parse_dates')]
+    while specs:
+        spec = specs.pop()
+        if isinstance(spec, dict):
+            specs.extend(spec.values())
+        elif isinstance(spec, (list, tuple)):
+            specs.extend(spec)
+        elif isinstance(spec, str):
+            names.append(spec)
+        elif spec is not None and not isinstance(spec, bool):
+            return None
+    return names
+
+
+class ColumnSelection(object):
+    """Callable usecols of a text parser, selecting columns by name.
+
+    Unlike a lambda, it can be passed to worker processes, and has a fixed representation for the parse cache.
+    Columns that are not in the file are ignored.
+    """
+
+    def __init__(self, names):
+        """Initialize column selection.
+
+        :param list names: names of the columns to select
+        """
+        self.names = frozenset(names)
+
+    def __call__(self, col):
+        """Check if column is selected."""
+        return col in self.names
+
+    def __repr__(self):
+        """Representation of column selection."""
+        return '{}({!r})'.format(type(self).__name__, sorted(self.names, key=str))
+
+
+def apply_selection(df, query_set, select_columns):
+    """Apply queries and column selection to DataFrame.
+
+    :param pd.DataFrame df: input data
+    :param list query_set: query expressions to evaluate in order, see pd.DataFrame.query
+    :param list select_columns: column names to select after querying
+    :returns: selected data
+    :rtype: pd.DataFrame
+    """
+    for query in query_set:
+        df = df.query(query)
+    return df[select_columns] if select_columns else df
+
+
+# readers of delimited text files, which infer the dtypes of every chunk unless given explicitly
+TEXT_PARSERS = (pd.read_csv, pd.read_table)
+
+
+def infer_schema(df, nullable=False):
+    """Infer the schema of a DataFrame, to be passed on to a text parser.
+
+    Columns without any value in the DataFrame are left unresolved, as nothing is known about them.
+
+    :param pd.DataFrame df: sample of the data
+    :param bool nullable: lock integer and boolean columns to the nullable pandas dtypes, such that
+        missing values beyond the sample can be parsed. Default is False.
+    :returns: dictionary with the dtype per column, the list of date columns and the list of unresolved
+        columns, as dtype, parse_dates and unresolved
+    :rtype: dict
+    """
+    dtype = {}
+    parse_dates = []
+    unresolved = []
+    for col, dt in df.dtypes.items():
+        if pd.api.types.is_datetime64_any_dtype(dt):
+            parse_dates.append(col)
+        elif df[col].isna().all():
+            unresolved.append(col)
+        elif nullable and isinstance(dt, np.dtype) and dt.kind in 'iub':
+            dtype[col] = pd.api.types.pandas_dtype('boolean' if dt.kind == 'b' else
+                                                   '{}Int{:d}'.format('U' if dt.kind == 'u' else '', dt.itemsize * 8))
+        else:
+            dtype[col] = dt
+    return dict(dtype=dtype, parse_dates=parse_dates, unresolved=unresolved)
+
+
+def apply_schema(df, schema):
+    """Convert DataFrame to the dtypes of a schema.
+
+    :param pd.DataFrame df: input data
+    :param dict schema: schema, see infer_schema()
+    :returns: converted data
+    :rtype: pd.DataFrame
+    """
+    dtypes = dict(schema['dtype'], **{col: np.dtype('datetime64[ns]') for col in schema['parse_dates']})
+    dtypes = {col: dt for col, dt in dtypes.items() if col in df.columns and df[col].dtype != dt}
+    return df.astype(dtypes) if dtypes else df
+
+
+# file extensions of compressed files, which cannot be split into byte ranges
+COMPRESSED_EXTENSIONS = ('gz', 'bz2', 'zip', 'xz', 'zst')
+
+
+class ByteRangeFile(io.RawIOBase):
+    """Read-only file object that exposes a byte range of a file.
+
+    Optionally the leading lines of the file (skipped rows and header) are
+    prepended to the byte range, so that the range can be parsed as a complete
+    delimited file.
+    """
+
+    def __init__(self, path, begin, end, header_end=0):
+        """Open the file and position it at the start of the byte range.
+
+        :param str path: file location
+        :param int begin: first byte of the range
+        :param int end: end of the range (exclusive)
+        :param int header_end: end of the leading lines (exclusive). Default is 0 (no leading lines).
+        """
+        super().__init__()
+        self._file = open(path, 'rb')
+        self._header = self._file.read(header_end)
+        self._file.seek(begin)
+        self._end = end
+
+    def readable(self):
+        """Return True: the byte range can be read."""
+        return True
+
+    def readinto(self, buf):
+        """Read bytes of header and range into buffer.
+
+        :param buf: pre-allocated, writable bytes-like object
+        :returns: number of bytes read
+        :rtype: int
+        """
+        if self._header:
+            data, self._header = self._header[:len(buf)], self._header[len(buf):]
+        else:
+            data = self._file.read(max(0, min(len(buf), self._end - self._file.tell())))
+        buf[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        """Close the underlying file."""
+        self._file.close()
+        super().close()
+
+
+def csv_header_end(path, kwargs):
+    """Determine the end of the leading lines of a delimited file that the parser consumes.
+
+    These are the rows skipped with skiprows, followed by the header rows.
+    As in pandas, blank lines and commented lines before the header are not counted as header rows.
+
+    :param str path: file location
+    :param dict kwargs: kwargs of the pandas reader
+    :returns: byte offset of the first data line
+    :rtype: int
+    """
+    skiprows = kwargs.get('skiprows')
+    n_skip = 0 if skiprows is None else skiprows if isinstance(skiprows, (int, np.integer)) else len(skiprows)
+    header = kwargs.get('header', 'infer')
+    if isinstance(header, str) and header == 'infer':
+        header = None if kwargs.get('names') is not None else 0
+    n_header = 0 if header is None else int(np.max(header)) + 1
+    comment = kwargs.get('comment')
+    comment = comment.encode(kwargs.get('encoding') or 'utf-8') if comment else None
+    skip_blank_lines = kwargs.get('skip_blank_lines', True)
+    with open(path, 'rb') as f:
+        for _ in range(n_skip):
+            f.readline()
+        while n_header > 0:
+            line = f.readline()
+            if not line:
+                break
+            if (skip_blank_lines and not line.strip(b'\r\n')) or (comment and line.startswith(comment)):
+                continue
+            n_header -= 1
+        return f.tell()
+
+
+def line_aligned_byte_range(path, index, n_ranges, header_end=0):
+    """Determine byte range of file, aligned to line boundaries.
+
+    The body of the file (i.e. excluding the leading lines up to header_end) is
+    split into n_ranges ranges of about equal size. Each boundary is moved forward
+    to the start of the next line, such that every line falls in exactly one range.
+
+    :param str path: file location
+    :param int index: index of the requested range
+    :param int n_ranges: number of ranges to split the file into
+    :param int header_end: end of the leading lines, see csv_header_end(). Default is 0.
+    :returns: tuple of header end, range begin and range end
+    :rtype: tuple
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+
+        def align(pos):
+            if pos <= header_end or pos >= size:
+                return min(max(pos, header_end), size)
+            # a position at the start of a line is kept, otherwise move to start of next line
+            f.seek(pos - 1)
+            f.readline()
+            return f.tell()
+
+        body = size - header_end
+        begin = align(header_end + body * index // n_ranges)
+        end = align(header_end + body * (index + 1) // n_ranges)
+    return header_end, begin, end
+
+
+def fork_count():
+    """Get the number of forks of the chain being executed.
+
+    :returns: number of forks
+    :rtype: int
+    """
+    fs = process_manager.service(ForkStore)
+    # NB forks share the connection to the ForkStore, so always access it under lock
+    with fs.lock:
+        return fs['n_fork']
+
+
+def balanced_file_bins(paths, n_bins):
+    """Distribute files over bins of about equal total file size.
+
+    Uses the longest-processing-time-first rule: files are assigned in order of
+    decreasing size, each to the bin with the smallest total size so far.
+
+    :param list paths: file locations
+    :param int n_bins: number of bins
+    :returns: list of n_bins lists of paths, each in original path order
+    :rtype: list
+    """
+    sizes = [os.path.getsize(p) for p in paths]
+    order = sorted(range(len(paths)), key=lambda i: (-sizes[i], i))
+    heap = [(0, b) for b in range(n_bins)]
+    bins = [[] for _ in range(n_bins)]
+    for i in order:
+        load, b = heapq.heappop(heap)
+        bins[b].append(i)
+        heapq.heappush(heap, (load + sizes[i], b))
+    return [[paths[i] for i in sorted(b)] for b in bins]
+
+
+class SharedFileQueue(object):
+    """Queue of files shared between forked processes.
+
+    The position in the queue is kept in the ForkStore, so forks pull files
+    from the queue until it is empty.  Larger files are handed out first.
+    """
+
+    def __init__(self, paths, key):
+        """Set up the queue.
+
+        :param list paths: file locations
+        :param str key: ForkStore key of the queue position
+        """
+        self.paths = sorted(paths, key=lambda p: -os.path.getsize(p))
+        self.key = key
+
+    def pop(self):
+        """Take the next file from the queue.
+
+        :returns: file location, None if the queue is empty
+        :rtype: str
+        """
+        fs = process_manager.service(ForkStore)
+        with fs.lock:
+            idx = fs.get(self.key, 0)
+            if idx >= len(self.paths):
+                return None
+            fs[self.key] = idx + 1
+        return self.paths[idx]
+
+    @property
+    def finished(self):
+        """Check if all files have been taken from the queue."""
+        fs = process_manager.service(ForkStore)
+        with fs.lock:
+            return fs.get(self.key, 0) >= len(self.paths)
+
+
+class DataPrefetcher(object):
+    """Read datasets ahead in a background thread.
+
+    The prefetcher repeatedly calls a producer function in a daemon thread and
+    keeps up to `size` results in a bounded queue, such that parsing of the next
+    dataset(s) overlaps with the processing of the current one.
+    The producer returns a tuple (data, state), where state is a dict that holds
+    at least the key 'finished'.  Production stops once the producer returns no
+    data and reports to be finished.
+    """
+
+    _END = object()
+
+    def __init__(self, producer, size=1):
+        """Start the background reader thread.
+
+        :param producer: function without arguments, returning a tuple (data, state)
+        :param int size: maximum number of prefetched datasets. Default is 1.
+        """
+        self._producer = producer
+        self._queue = queue.Queue(maxsize=max(1, size))
+        self._stop = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(target=self._run, name='DataPrefetcher', daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        """Put item in the queue, unless the prefetcher is being stopped."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        """Keep on producing datasets until done or stopped."""
+        try:
+            while not self._stop.is_set():
+                data, state = self._producer()
+                if not self._put((data, state, None)):
+                    return
+                if data is None and state['finished']:
+                    break
+        except BaseException as exc:
+            self._put((None, None, exc))
+            return
+        self._put((self._END, None, None))
+
+    def get(self):
+        """Get the next prefetched dataset.
+
+        :returns: tuple of (data, state) as returned by the producer
+        :raises: the exception raised by the producer, if any
+        """
+        if not self._done:
+            data, state, exc = self._queue.get()
+            if exc is not None:
+                self._done = True
+                raise exc
+            if data is not self._END:
+                return data, state
+            self._done = True
+        # all datasets have been handed out
+        return None, {'finished': True}
+
+    def close(self):
+        """Stop the background thread and discard prefetched datasets."""
+        self._stop.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join()
 
 
 class ReadToDf(Link):
@@ -174,21 +1739,121 @@ class ReadToDf(Link):
         * path contains extensions {'npy', 'npz'}
         * param `file_type` is {'npy', 'npz'}
 
+        To use the columnar numpy reader, which memory-maps the columns, one of the following should be true:
+
+        * reader is 'npcol'
+        * path contains extension 'npcol'
+
         To use the feather reader one of the following should be true:
 
         * reader is {'feather', 'ft'}
         * path contains extensions 'ft'
 
+        To use the parquet reader one of the following should be true:
+
+        * reader is {'parquet', 'pq'}
+        * path contains extensions {'parquet', 'pq'}
+
+        The parquet reader accepts the options columns (or usecols) for column projection and filters, a list of
+        (column, op, value) predicates used to skip row groups and to select rows. It supports chunksize.
+
+        Files with one JSON object per line are read with extensions {'jsonl', 'ndjson'}.
+
+        Partitioned datasets, written by WriteFromDf with partition_cols, are read with reader 'partitioned',
+        which is picked automatically for their directories. The reader accepts columns (or usecols) and filters,
+        as the parquet reader. Partitions that do not pass the filters on the partition columns are skipped.
+        It supports chunksize. NB the rows are read back ordered by partition.
+
+        Delimited text files read with pd.read_csv or pd.read_table are parsed with the multi-threaded CSV reader
+        of Apache Arrow with option engine='arrow', also in chunks. The pandas options sep (or delimiter), header,
+        names, index_col, usecols, dtype, parse_dates (list of columns, parsed by pandas), skiprows (number of rows), nrows,
+        na_values, keep_default_na, true_values, false_values, quotechar, escapechar and encoding are mapped
+        onto the Arrow options; other options raise an error. Option block_size sets the number of bytes
+        Arrow processes at a time. NB Arrow also parses ISO 8601 timestamps not in parse_dates, and when reading
+        in chunks infers the column types from the first block; give the dtype of columns that differ further on.
+
         When to use feather or which numpy type see the esk210_dataframe_restoration tutorial
         :param bool restore_index: whether to store the index in the
         metadata. Default is False when the index is numeric, True otherwise.
         :param str file_type: {'npy', 'npz'} when using the numpy reader
         Optional, see reader for details.
+        :param str mmap_mode: memory-map mode when using the columnar numpy reader, see numpy.load.
+        Default is 'r' (read-only), 'c' is copy-on-write.
+        :param bool memory_map: memory-map the file when using the feather reader, such that numeric columns
+        without missing values are not copied. NB these columns are read-only. Default is False: the columns are
+        read into memory, and can be changed in place. Chunked feather reads always memory-map the file, and only
+        copy the chunks read unless memory_map is set.
         :param bool itr_over_files: Iterate over individual files, default is false.
         If false, are files are collected in one dataframe. NB chunksize takes priority!
         :param int chunksize: Default is none. If positive integer then will always iterate.
-        chunksize requires pd.read_csv or pd.read_table.
+        chunksize is supported by pd.read_csv, pd.read_table and the JSON lines, HDF5 (fixed and table format),
+        parquet, feather and numpy readers. The npz and columnar numpy chunks, and the feather chunks with
+        memory_map, are slices of the memory-mapped file.
+        :param int target_chunk_bytes: memory budget per chunk, in bytes. If set, will always iterate.
+        The number of bytes per row is estimated from each chunk read (with memory_usage(deep=True)),
+        and the chunksize of the next chunks is adapted to stay within the budget.
+        The first chunk has chunksize rows, default 1000.
         :param int n_files_in_fork: number of files to process if forked. Default is 1.
+        :param str fork_mode: how the input is split between forks. Default is 'files': each fork reads
+        n_files_in_fork whole files. With 'byte_range' each fork reads a separate byte range of every
+        (uncompressed, delimited) file, aligned to line boundaries and parsed with the header of the file.
+        The leading rows skipped with skiprows (leading rows only) and the header rows are prepended to every range.
+        NB the byte ranges assume that no quoted field contains a line break.
+        With 'balanced' the files are distributed over the forks in bins of about equal total file size.
+        With 'queue' the forks keep on pulling files from a shared work queue until it is empty.
+        :param int n_prefetch: when iterating, number of datasets (files or chunks) to read ahead in a background
+        thread, while the chain processes the current dataset. Default is 0 (no prefetching).
+        :param int n_workers: when not iterating, number of files to read concurrently. Default is 1.
+        :param str worker_type: type of worker pool used when n_workers > 1, 'thread' or 'process'.
+        Default is 'thread'. The process pool requires a picklable reader and reader kwargs.
+        :param str cache_dir: directory of an on-disk cache of parsed files. Default is None (no caching).
+        Whole files that are read are stored in the columnar numpy format, and are read from the cache as long as
+        the path, modification time and size of the file, and the reader settings, are unchanged.
+        Chunked reads are not cached.
+        :param int cache_max_bytes: maximum size of the cache directory in bytes; the least recently used entries
+        are removed beyond it. Default is no limit.
+        :param optimize_memory: reduce the memory usage of the datasets read, see DfMemoryOptimizer.
+        Numeric columns are downcast and low-cardinality string columns become categories. The dtypes are
+        determined from the first dataset, and kept for all datasets, e.g. all chunks. The bytes saved per column
+        are stored in the datastore under 'memory_savings_' + key. Set to True, or to a dict with the options
+        downcast, max_category_fraction, string_dtype and columns. Default is False.
+        When reading in chunks, the default string_dtype is 'string[pyarrow]', as categories may grow from chunk
+        to chunk.
+        :param bool lock_schema: use the same schema for all datasets, e.g. all chunks. Default is False.
+        For pd.read_csv and pd.read_table the schema is inferred once, from the first schema_sample_rows rows of
+        the first file, and passed on as explicit dtype and parse_dates to all reads. Integer and boolean columns
+        are read with the nullable pandas dtypes (e.g. Int64), such that missing values beyond the sample can be
+        parsed. Columns given in the dtype option keep these dtypes.
+        For other readers, the schema of the first dataset is applied to all later datasets.
+        Columns without any value so far are locked to the dtype of the first dataset with values for them.
+        The schema is stored in the datastore under 'schema_' + key.
+        :param int schema_sample_rows: number of rows read to infer the schema. Default is 10000.
+        :param list query_set: query expressions, applied in order to each file or chunk right after reading,
+        see ApplySelectionToDf. Default is no queries.
+        :param list select_columns: column names to select after querying. Default is all columns.
+        The selection is pushed down into the readers where possible: the columns needed, including the index
+        and date columns of the text parsers, are passed on as usecols to pd.read_csv and pd.read_table, and as
+        columns to the parquet, partitioned and HDF5 (table) readers; comparisons of columns with constants are passed on as parquet and partitioned filters and as
+        HDF5 where conditions.
+        NB chunks are counted before the selection, so they may be shorter than chunksize, or even empty.
+        :param int batch_rows: when iterating over files, without chunksize, keep on reading files until the batch
+        holds at least batch_rows records, and pass them on as one concatenated dataset. Default is None.
+        :param int batch_bytes: idem, until the batch holds at least batch_bytes bytes (memory_usage(deep=True)).
+        Default is None. If both batch_rows and batch_bytes are set, the first target reached ends the batch.
+        :param str checkpoint_path: when iterating, file to write checkpoints to. Default is None (no checkpoints).
+        A checkpoint holds the position of the iterator, i.e. the file and the row offset in the file, and the
+        accumulated state of the histogram fillers that store at finalize. Not supported in forked processing.
+        :param int checkpoint_every: number of datasets after which a checkpoint is written. Default is 100.
+        :param bool resume: resume from the checkpoint, if it exists. The iteration continues after the last dataset
+        of the checkpoint. Default is False.
+        :param str io_metrics_key: key of a dataframe with I/O metrics in the datastore. Default is None (no metrics).
+        For each dataset read, i.e. each file or chunk, the metrics are the file path, the index of the chunk in the
+        file, the number of rows, the number of bytes read, the parse time in seconds, the rows per second and the
+        in-memory size of the dataframe in bytes (memory_usage(deep=True)), before selection. For whole files the
+        bytes read are the size of the file (or byte range); for chunks of the pandas text and JSON readers they are
+        the bytes consumed from the file, including read-ahead, and for other chunk readers they are unknown (NaN).
+        The dataframe is stored at finalize, and a summary is logged. In forked processing each fork only holds its
+        own metrics.
         :param kwargs: all other key word arguments are passed on to the pandas reader.
         """
         # initialize Link, pass name from kwargs
@@ -198,26 +1863,68 @@ class ReadToDf(Link):
         # second arg is default value for an attribute. key is popped from kwargs.
         self._process_kwargs(kwargs, path='', key='', reader=None,
                              itr_over_files=False, chunksize=None,
-                             n_files_in_fork=1)
+                             n_files_in_fork=1, fork_mode='files', n_prefetch=0, n_workers=1,
+                             worker_type='thread', target_chunk_bytes=None, cache_dir=None, cache_max_bytes=None,
+                             optimize_memory=False, lock_schema=False, schema_sample_rows=10000,
+                             query_set=[], select_columns=[], batch_rows=None, batch_bytes=None,
+                             checkpoint_path=None, checkpoint_every=100, resume=False, io_metrics_key=None)
 
         # pass on remaining kwargs to pandas reader
         self.kwargs = copy.deepcopy(kwargs)
 
         self._abs_paths = []
         self._paths = None
+        self._byte_ranges = {}
         self._path_itr = None
+        self._path_queue = None
         self._current_path = None
         self._latest_data_length = 0
+        self._latest_raw_length = 0
         self._sum_data_length = 0
         self._iterate = False
         self._reader = None
+        self._prefetcher = None
+        self._prefetch_state = None
+        self._latest_chunk_size = None
+        self._cache = None
+        self._memory_optimizer = None
+        self._schema = None
+        self._schema_prescanned = False
+        self._batching = False
+        self._n_paths_opened = 0
+        self._file_offset = 0
+        self._n_datasets = 0
+        self._position = (0, 0)
+        self._resume_position = None
+        self._checkpointing = False
+        self._n_file_chunks = 0
+        self._io_metrics = []
 
     def set_chunk_size(self, size):
         """Set chunksize setting.
 
+        The new chunk size also applies to the next chunks of the file that is being read.
+
         :param size: chunk size
         """
         self.kwargs['chunksize'] = self.chunksize = size
+        if is_chunk_reader(self._reader):
+            self._reader.chunksize = size
+
+    def adapt_chunk_size(self, data):
+        """Adapt chunksize to the memory budget per chunk.
+
+        :param pd.DataFrame data: latest chunk, used to estimate the number of bytes per row
+        """
+        n_rows = len(data.index)
+        if n_rows == 0:
+            return
+        row_bytes = max(data.memory_usage(deep=True).sum() / n_rows, 1.)
+        size = max(int(self.target_chunk_bytes // row_bytes), 1)
+        if size != self.chunksize:
+            self.logger.debug('Estimated {row_bytes:.1f} bytes per row; changing chunksize from {old:d} to {new:d}.',
+                              row_bytes=row_bytes, old=self.chunksize, new=size)
+            self.set_chunk_size(size)
 
     def initialize(self):
         """Initialize the link."""
@@ -243,6 +1950,13 @@ class ReadToDf(Link):
             for pe in gp:
                 self._abs_paths.append(os.path.abspath(pe))
 
+        # a memory budget per chunk implies iteration, starting with chunks of 1000 rows
+        if self.target_chunk_bytes is not None:
+            assert isinstance(self.target_chunk_bytes, int) and self.target_chunk_bytes > 0, \
+                'target_chunk_bytes needs to be set to positive integer.'
+            if self.chunksize is None:
+                self.chunksize = 1000
+
         # now determine if file iterator will be used. Will iterate if:
         # 1. chunksize>0.
         # 2. see: configure_paths() below
@@ -250,15 +1964,60 @@ class ReadToDf(Link):
             assert isinstance(self.chunksize,
                               int) and self.chunksize > 0, 'Chunksize needs to be set to positive integer.'
             self._iterate = True
-            self.logger.info('chunksize = {size:d}. NB chunksize requires pd.read_csv or pd.read_table.',
+            self.logger.info('chunksize = {size:d}. NB chunksize requires a reader that supports iteration.',
                              size=self.chunksize)
             # add back chunksize if it was a kwarg, so it's picked up by pandas.
             self.kwargs['chunksize'] = self.chunksize
             self.logger.info('kwargs passed on to pandas reader are: {kwargs}', kwargs=self.kwargs)
 
+        if isinstance(self.query_set, str):
+            self.query_set = [self.query_set]
+        if isinstance(self.select_columns, str):
+            self.select_columns = [self.select_columns]
+        assert isinstance(self.query_set, list), 'query_set needs to be a list of strings.'
+        assert isinstance(self.select_columns, list), 'select_columns needs to be a list of strings.'
+        for batch_size in ('batch_rows', 'batch_bytes'):
+            value = getattr(self, batch_size)
+            assert value is None or (isinstance(value, int) and value > 0), \
+                '{} needs to be set to positive integer.'.format(batch_size)
+        if self.batch_rows is not None or self.batch_bytes is not None:
+            assert self.chunksize is None, 'Batching of files cannot be combined with chunksize.'
+            self._batching = True
+        assert isinstance(self.checkpoint_every, int) and self.checkpoint_every > 0, \
+            'checkpoint_every needs to be set to positive integer.'
+        assert isinstance(self.schema_sample_rows, int) and self.schema_sample_rows > 0, \
+            'schema_sample_rows needs to be set to positive integer.'
+        assert isinstance(self.n_prefetch, int) and self.n_prefetch >= 0, \
+            'n_prefetch needs to be set to non-negative integer.'
+        assert isinstance(self.n_workers, int) and self.n_workers > 0, 'n_workers needs to be set to positive integer.'
+        assert self.worker_type in ('thread', 'process'), 'worker_type needs to be "thread" or "process".'
+        assert self.fork_mode in ('files', 'byte_range', 'balanced', 'queue'), \
+            'fork_mode needs to be "files", "byte_range", "balanced" or "queue".'
+        if self.fork_mode == 'byte_range':
+            skiprows = self.kwargs.get('skiprows')
+            assert skiprows is None or isinstance(skiprows, (int, np.integer)) or \
+                (not callable(skiprows) and sorted(skiprows) == list(range(len(skiprows)))), \
+                'fork_mode "byte_range" requires skiprows to skip leading rows only.'
+            assert not self.kwargs.get('skipfooter') and self.kwargs.get('nrows') is None, \
+                'fork_mode "byte_range" cannot be combined with skipfooter or nrows.'
+
+        if self.cache_dir:
+            assert self.cache_max_bytes is None or \
+                (isinstance(self.cache_max_bytes, int) and self.cache_max_bytes >= 0), \
+                'cache_max_bytes needs to be set to non-negative integer.'
+            self._cache = ParseCache(self.cache_dir, self.cache_max_bytes)
+            self.logger.info('Using parse cache in "{dir}".', dir=self._cache.cache_dir)
+
         # configure paths to pick up at execute
         self.configure_paths()
 
+        if self.optimize_memory:
+            options = dict(self.optimize_memory) if isinstance(self.optimize_memory, dict) else {}
+            if self._iterate:
+                # categories can grow from dataset to dataset, which changes the dtype; arrow strings do not
+                options.setdefault('string_dtype', 'string[pyarrow]')
+            self._memory_optimizer = MemoryOptimizer(**options)
+
         return StatusCode.Success
 
     def configure_paths(self, lock:bool=False) -> None:
@@ -277,7 +2036,35 @@ class ReadToDf(Link):
         # set paths to read.
         # this depends on whether execute() is forked
         settings = process_manager.service(ConfigObject)
-        if settings.get('fork', False): # during fork
+        if settings.get('fork', False) and self.fork_mode == 'byte_range':
+            # each fork reads its own byte range of every file
+            fidx = settings['fork_index']
+            n_fork = fork_count()
+            self._byte_ranges = {}
+            for path in self._abs_paths:
+                # the leading lines are prepended to every range, where the reader kwargs skip them as in the file
+                header_end = csv_header_end(path, self.kwargs)
+                header_end, begin, end = line_aligned_byte_range(path, fidx, n_fork, header_end)
+                if begin < end:
+                    self._byte_ranges[path] = (header_end, begin, end)
+            self._paths = np.array([p for p in self._abs_paths if p in self._byte_ranges])
+            self.logger.debug('Fork {idx:d} reads byte ranges {ranges}.', idx=fidx, ranges=self._byte_ranges)
+            self.config_lock = True
+        elif settings.get('fork', False) and self.fork_mode == 'balanced':
+            # each fork reads a bin of files with about equal total size
+            fidx = settings['fork_index']
+            n_fork = fork_count()
+            if n_fork > len(self._abs_paths):
+                self.logger.warning('More forks ({n_fork:d}) than files ({n:d}); some forks will be idle.',
+                                    n_fork=n_fork, n=len(self._abs_paths))
+            self._paths = np.array(balanced_file_bins(self._abs_paths, n_fork)[fidx])
+            self.config_lock = True
+        elif settings.get('fork', False) and self.fork_mode == 'queue':
+            # all forks pull files from a shared queue
+            self._paths = np.array(self._abs_paths)
+            self._path_queue = SharedFileQueue(self._abs_paths, 'file_queue_' + self.name)
+            self.config_lock = True
+        elif settings.get('fork', False): # during fork
             fidx = settings['fork_index']
             begin = self.n_files_in_fork * fidx
             end = self.n_files_in_fork * (fidx + 1)
@@ -320,10 +2107,23 @@ class ReadToDf(Link):
         if not self._iterate:
             self.logger.debug('Reading datasets from files [{files}]',
                               files=', '.join('"{}"'.format(p) for p in self._paths))
-            df = pd.concat(set_reader(p, self.reader, **self.kwargs) for p in self._paths)
+            if self._path_queue is not None:
+                # keep on pulling files from the shared queue until it is empty
+                datasets = [d for p in iter(self._path_queue.pop, None) for d in self.read_files([p])]
+            else:
+                datasets = self.read_files(self._paths) if len(self._paths) > 0 else []
+            # NB a fork can be left without input, e.g. when there are more forks than files.
+            # a single dataset is not concatenated, which would copy (memory-mapped) data.
+            df = datasets[0] if len(datasets) == 1 else pd.concat(datasets) if datasets else pd.DataFrame()
             numentries = len(df.index)
         # 2. handle case where iteration has been turned on
         else:
+            if self.checkpoint_path and self._n_datasets == 0 and not self._checkpointing:
+                self._start_checkpointing(settings)
+            elif self._checkpointing and self._n_datasets % self.checkpoint_every == 0:
+                # the previous dataset has been processed by the chain
+                self.write_checkpoint()
+
             # try picking up new dataset from iterator
             df = next(self)
             while self.latest_data_length() == 0 and not self.is_finished():
@@ -345,29 +2145,217 @@ class ReadToDf(Link):
             self.logger.info('Read next <{n:d}> records; summing up to <{sum_n:d}>.', n=numentries, sum_n=sumentries)
             ds['n_sum_' + self.key] = sumentries
 
+        if self._memory_optimizer is not None:
+            df, bytes_saved = self._memory_optimizer.optimize(df)
+            log_memory_savings(bytes_saved, self.logger)
+            ds['memory_savings_' + self.key] = bytes_saved
+
+        if self._schema is not None:
+            ds['schema_' + self.key] = dict(self._schema['dtype'], **{c: np.dtype('datetime64[ns]')
+                                                                       for c in self._schema['parse_dates']})
+
         # store dataframe and number of entries
         ds[self.key] = df
         ds['n_' + self.key] = numentries
 
         return StatusCode.Success
 
+    def finalize(self):
+        """Finalize the link.
+
+        Stop the background reader, if still running, remove the checkpoint of a completed run, and store the
+        I/O metrics.
+        """
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
+        # a completed run needs no checkpoint
+        if self._checkpointing and self.is_finished() and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        if self.io_metrics_key:
+            metrics = self.io_metrics()
+            self.log_io_metrics(metrics)
+            process_manager.service(DataStore)[self.io_metrics_key] = metrics
+
+        return StatusCode.Success
+
+    def read_files(self, paths):
+        """Read all files, concurrently if n_workers > 1.
+
+        Parse timings are reported per file.
+
+        :param paths: file paths to read
+        :returns: list of datasets, in order of the input paths
+        :rtype: list
+        """
+        paths = [str(p) for p in paths]
+        n_workers = min(self.n_workers, len(paths))
+        if n_workers > 1:
+            self.logger.debug('Reading {n:d} files with {n_workers:d} {type} workers.',
+                              n=len(paths), n_workers=n_workers, type=self.worker_type)
+            executor = ThreadPoolExecutor if self.worker_type == 'thread' else ProcessPoolExecutor
+            with executor(max_workers=n_workers) as pool:
+                results = list(pool.map(timed_read, paths, repeat(self.reader),
+                                        [self.reader_kwargs(p) for p in paths], repeat(self._cache)))
+        else:
+            results = [timed_read(p, self.reader, self.reader_kwargs(p), self._cache) for p in paths]
+
+        for path, (data, seconds) in zip(paths, results):
+            self.logger.info('Parsed file "{path}" in {sec:.3f} seconds.', path=path, sec=seconds)
+            if self.io_metrics_key:
+                self._io_metrics.append(io_metrics_record(path, 0, data, file_bytes(path, self._byte_ranges.get(path)),
+                                                          seconds))
+        datasets = [data for data, _ in results]
+        if self.lock_schema:
+            datasets = [self.lock_dataset_schema(data) for data in datasets]
+        if self.query_set or self.select_columns:
+            datasets = [apply_selection(data, self.query_set, self.select_columns) for data in datasets]
+        return datasets
+
+    def reader_kwargs(self, path):
+        """Get key word arguments for the reader of a file.
+
+        :param str path: file location
+        :returns: reader kwargs, including the byte range of the file to read, if any
+        :rtype: dict
+        """
+        kwargs = self.kwargs
+        if self.lock_schema and resolve_reader(path, self.reader) in TEXT_PARSERS:
+            if self._schema is None:
+                self._schema = self.prescan_schema(path)
+            # dtypes given explicitly by the user take precedence
+            dtype = self.kwargs.get('dtype')
+            dtype = dict(self._schema['dtype'], **dtype) if isinstance(dtype, dict) else \
+                dtype if dtype is not None else dict(self._schema['dtype'])
+            kwargs = dict(kwargs, dtype=dtype)
+            if not isinstance(self.kwargs.get('parse_dates'), (bool, dict)):
+                kwargs['parse_dates'] = self._schema['parse_dates']
+        if path in self._byte_ranges:
+            kwargs = dict(kwargs, byte_range=self._byte_ranges[path])
+        if self.query_set or self.select_columns:
+            kwargs = dict(kwargs, **self.pushdown_kwargs(path, kwargs))
+        return kwargs
+
+    def pushdown_kwargs(self, path, kwargs):
+        """Get reader key word arguments that apply the selection while reading.
+
+        :param str path: file location
+        :param dict kwargs: reader kwargs
+        :returns: additional reader kwargs
+        :rtype: dict
+        """
+        reader = resolve_reader(path, self.reader)
+        names = query_columns(self.query_set)
+        columns = None
+        if self.select_columns and names is not None:
+            columns = list(self.select_columns) + [n for n in names if n not in self.select_columns]
+
+        pushdown = {}
+        if reader in TEXT_PARSERS:
+            needed = parser_columns(kwargs)
+            if columns is not None and kwargs.get('usecols') is None and needed is not None:
+                pushdown['usecols'] = ColumnSelection(columns + needed)
+        elif reader in (parquet_reader, partitioned_reader):
+            if reader == parquet_reader:
+                import pyarrow.parquet as pq
+                schema_names = pq.read_schema(path).names
+            else:
+                schema_names = partition_metadata(path)['columns']
+            if columns is not None and kwargs.get('columns', kwargs.get('usecols')) is None:
+                pushdown['columns'] = [c for c in columns if c in schema_names]
+            predicates = [p for p in query_predicates(self.query_set) if p[0] in schema_names]
+            if predicates:
+                filters = normalize_filters(kwargs.get('filters'))
+                pushdown['filters'] = [f + predicates for f in filters] if filters else predicates
+        elif reader == hdf_reader:
+            with pd.HDFStore(path, mode='r') as store:
+                storer = store.get_storer(kwargs.get('key') or store.keys()[0])
+                if storer.is_table:
+                    data_columns = set(storer.data_columns) | {'index'}
+                    if columns is not None and kwargs.get('columns') is None:
+                        pushdown['columns'] = [c for c in columns if c in storer.non_index_axes[0][1]]
+                    where = ['{} {} {!r}'.format(*p) for p in query_predicates(self.query_set)
+                             if p[0] in data_columns and p[1] in REVERSED_OPERATORS]
+                    if where and kwargs.get('where') is None:
+                        pushdown['where'] = where
+        if pushdown:
+            self.logger.debug('Pushing selection down into reader of "{path}": {kwargs}', path=path, kwargs=pushdown)
+        return pushdown
+
+    def prescan_schema(self, path):
+        """Infer the schema from a sample of the rows of a file.
+
+        :param str path: file location
+        :returns: schema, see infer_schema()
+        :rtype: dict
+        """
+        kwargs = {k: v for k, v in self.kwargs.items() if k != 'chunksize'}
+        sample = set_reader(path, self.reader, nrows=self.schema_sample_rows, **kwargs)
+        schema = infer_schema(sample, nullable=True)
+        self._schema_prescanned = True
+        self.logger.debug('Inferred schema from {n:d} rows of "{path}": {schema}',
+                          n=len(sample.index), path=path, schema=schema)
+        return schema
+
+    def lock_dataset_schema(self, data):
+        """Lock the schema to that of the first dataset, and convert later datasets to it.
+
+        Columns without any value so far are locked once a dataset has values for them.
+        The text parsers are passed the schema as dtypes instead, see reader_kwargs(), so for these
+        only the newly locked columns are converted.
+
+        :param data: dataset read
+        :returns: dataset with the locked schema
+        """
+        if not isinstance(data, pd.DataFrame):
+            return data
+        if self._schema is None:
+            self._schema = infer_schema(data)
+            return data
+        resolved = [c for c in self._schema['unresolved'] if c in data.columns and data[c].notna().any()]
+        if resolved:
+            schema = infer_schema(data[resolved], nullable=self._schema_prescanned)
+            self._schema['dtype'].update(schema['dtype'])
+            self._schema['parse_dates'].extend(schema['parse_dates'])
+            self._schema['unresolved'] = [c for c in self._schema['unresolved'] if c not in resolved]
+            self._schema['resolved'] = self._schema.get('resolved', []) + resolved
+            self.logger.debug('Locked schema of columns {cols}: {schema}', cols=resolved, schema=schema)
+        if self._schema_prescanned:
+            # later chunks of a file opened before the columns were locked are parsed without their dtypes
+            resolved = self._schema.get('resolved', [])
+            return apply_schema(data, dict(dtype={c: self._schema['dtype'][c] for c in resolved if c in
+                                                  self._schema['dtype']}, parse_dates=[])) if resolved else data
+        return apply_schema(data, self._schema)
+
     def is_finished(self) -> bool:
         """Try to assess if looper is done iterating over files.
 
         Assess if looper is done or if a next dataset is still coming up.
         """
-        finished = self._path_itr.finished
-        if isinstance(self.chunksize, int) and self.chunksize > 0:
-            finished &= (self._latest_data_length < self.chunksize)
+        # when prefetching, the file iterator runs ahead; use its state at the time the dataset was read
+        state = self._prefetch_state if self._prefetch_state is not None else \
+            {'finished': self._paths_finished(), 'chunksize': self._latest_chunk_size,
+             'raw_length': self._latest_raw_length}
+        finished = state['finished']
+        # compare the length before selection with the chunksize used for the latest dataset,
+        # which may since have been adapted
+        chunksize = state['chunksize'] if state['chunksize'] is not None else self.chunksize
+        if isinstance(chunksize, int) and chunksize > 0:
+            finished &= (state['raw_length'] < chunksize)
         return finished
 
     def __next__(self):
         """Pass up the next dataset in the loop.
 
-        Next file is either a entire file or a file chunk.
+        Next file is either a entire file or a file chunk, or a batch of files.
         Bookkeeping is kept uptodate.
         """
-        data = self._next()
+        data = self._next_dataset()
+        if self._batching and data is not None:
+            data = self._next_batch(data)
+        self._n_datasets += 1
 
         # bookkeeping
         try:
@@ -378,6 +2366,44 @@ class ReadToDf(Link):
 
         return data
 
+    def _next_dataset(self):
+        """Get the next dataset, from the background reader when prefetching."""
+        if self.n_prefetch == 0:
+            data = self._next()
+            self._position = self._file_position()
+            return data
+        # start the background reader at first call, i.e. after a possible fork
+        if self._prefetcher is None:
+            self.logger.debug('Prefetching up to {n:d} datasets in background.', n=self.n_prefetch)
+            self._prefetcher = DataPrefetcher(self._produce, self.n_prefetch)
+        data, self._prefetch_state = self._prefetcher.get()
+        if self._prefetch_state.get('path') is not None:
+            self._current_path = self._prefetch_state['path']
+        self._position = self._prefetch_state['position']
+        return data
+
+    def _next_batch(self, data):
+        """Add next files to dataset, until the batch size has been reached.
+
+        :param pd.DataFrame data: first dataset of the batch
+        :returns: batch of datasets, concatenated
+        :rtype: pd.DataFrame
+        """
+        datasets = [data]
+        n_rows = len(data.index)
+        n_bytes = data.memory_usage(deep=True).sum() if self.batch_bytes is not None else 0
+        while (self.batch_rows is None or n_rows < self.batch_rows) and \
+                (self.batch_bytes is None or n_bytes < self.batch_bytes) and not self.is_finished():
+            data = self._next_dataset()
+            if data is None:
+                break
+            datasets.append(data)
+            n_rows += len(data.index)
+            if self.batch_bytes is not None:
+                n_bytes += data.memory_usage(deep=True).sum()
+        self.logger.debug('Batched {n:d} files with {n_rows:d} records.', n=len(datasets), n_rows=n_rows)
+        return datasets[0] if len(datasets) == 1 else pd.concat(datasets)
+
     def latest_data_length(self):
         """Return length of current dataset."""
         return self._latest_data_length
@@ -386,37 +2412,242 @@ class ReadToDf(Link):
         """Return sum length of all datasets processed sofar."""
         return self._sum_data_length
 
+    def _produce(self):
+        """Read the next dataset, together with the iterator state at read time.
+
+        Used by the background reader when prefetching.
+
+        :returns: tuple of (data, state)
+        """
+        data = self._next()
+        return data, {'finished': self._paths_finished(), 'path': self._current_path,
+                      'chunksize': self._latest_chunk_size, 'raw_length': self._latest_raw_length,
+                      'position': self._file_position()}
+
+    def _file_position(self):
+        """Get the position of the file iterator.
+
+        :returns: tuple of the number of files opened, the number of rows read from the last one,
+            and whether the last one has been read entirely (not in chunks)
+        :rtype: tuple
+        """
+        return self._n_paths_opened, self._file_offset, self._reader is None
+
+    def _paths_finished(self):
+        """Check if all file paths have been taken for reading."""
+        return self._path_itr.finished if self._path_queue is None else self._path_queue.finished
+
+    def _pop_path(self):
+        """Take the next file path to read.
+
+        :returns: file path, None if there are no paths left
+        :rtype: str
+        """
+        if self._path_queue is not None:
+            return self._path_queue.pop()
+        if self._path_itr.finished:
+            return None
+        path = str(self._path_itr[0])
+        self._path_itr.iternext()
+        return path
+
     def _next(self):
         """Pass up the next dataset in the loop.
 
         This is either a entire file or a file chunk.
+        With a memory budget per chunk, the chunksize is adapted after reading.
+        """
+        if self._resume_position is not None:
+            self._restore_position(*self._resume_position)
+            self._resume_position = None
+        self._latest_chunk_size = self.chunksize
+        reader, position = self._reader, reader_position(self._reader)
+        start = time.time()
+        data = self._read_next()
+        seconds = time.time() - start
+        if self.lock_schema and data is not None:
+            data = self.lock_dataset_schema(data)
+        if self.io_metrics_key and data is not None:
+            self.record_io_metrics(data, seconds, self._bytes_read(reader, position))
+        # the raw length, before selection, tells if the end of a file has been reached
+        self._latest_raw_length = len(data.index) if data is not None else 0
+        self._file_offset += self._latest_raw_length
+        if (self.query_set or self.select_columns) and data is not None:
+            data = apply_selection(data, self.query_set, self.select_columns)
+        if self.target_chunk_bytes is not None and data is not None:
+            self.adapt_chunk_size(data)
+        return data
+
+    def _bytes_read(self, reader, position):
+        """Get the number of bytes read for the latest dataset.
+
+        :param reader: reader before the latest dataset was read
+        :param position: file position of this reader, see reader_position()
+        :returns: number of bytes read, NaN if unknown
+        """
+        if not is_chunk_reader(self._reader):
+            # an entire file has been read
+            return file_bytes(self._current_path, self._byte_ranges.get(self._current_path))
+        end = reader_position(self._reader)
+        if self._reader is not reader:
+            # first chunk of a new file
+            position = 0
+        return end - position if end is not None and position is not None else np.nan
+
+    def record_io_metrics(self, data, seconds, bytes_read):
+        """Record the I/O metrics of a dataset read from the current file.
+
+        :param pd.DataFrame data: dataset read
+        :param float seconds: parse time in seconds
+        :param bytes_read: number of bytes read, NaN if unknown
+        """
+        self._io_metrics.append(io_metrics_record(self._current_path, self._n_file_chunks, data, bytes_read, seconds))
+        self._n_file_chunks += 1
+
+    def io_metrics(self):
+        """Get the I/O metrics of all datasets read sofar.
+
+        :returns: dataframe with one row per dataset, see IO_METRICS_COLUMNS
+        :rtype: pd.DataFrame
+        """
+        return pd.DataFrame(self._io_metrics, columns=IO_METRICS_COLUMNS)
+
+    def log_io_metrics(self, metrics):
+        """Log a summary of the I/O metrics.
+
+        :param pd.DataFrame metrics: I/O metrics, see io_metrics()
+        """
+        seconds = metrics['parse_seconds'].sum()
+        n_rows = metrics['rows'].sum()
+        n_bytes = metrics['bytes_read'].sum()
+        self.logger.info('Read {n:d} datasets from {n_files:d} files: {n_rows:d} records and {mb:.1f} MB in '
+                         '{sec:.3f} seconds of parsing; {rate:.0f} records/s, {mb_rate:.1f} MB/s; '
+                         'largest dataset {max_mb:.1f} MB in memory.',
+                         n=len(metrics.index), n_files=metrics['path'].nunique(), n_rows=int(n_rows),
+                         mb=n_bytes / 1e6, sec=seconds, rate=n_rows / seconds if seconds > 0 else np.nan,
+                         mb_rate=n_bytes / 1e6 / seconds if seconds > 0 else np.nan,
+                         max_mb=metrics['memory_bytes'].max() / 1e6 if len(metrics.index) else 0.)
+
+    def _start_checkpointing(self, settings):
+        """Turn on checkpointing, and resume from the last checkpoint if requested.
+
+        :param settings: configuration object
+        """
+        if settings.get('fork', False):
+            self.logger.warning('Checkpoints are not supported in forked processing; not writing them.')
+            return
+        self._checkpointing = True
+        if self.resume and os.path.exists(self.checkpoint_path):
+            self.resume_checkpoint()
+
+    def write_checkpoint(self):
+        """Write the iterator position and the state of the histogram fillers to the checkpoint file.
+
+        The position is that of the latest dataset passed on, which has been processed by the
+        rest of the chain.
+        """
+        state = dict(paths=[str(p) for p in self._paths], position=self._position, chunksize=self.chunksize,
+                     n_datasets=self._n_datasets, sum_data_length=self._sum_data_length,
+                     links={key: link.checkpoint_state() for key, link in checkpoint_links().items()})
+        tmp_path = '{}.tmp'.format(self.checkpoint_path)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f)
+        # replace the previous checkpoint only once the new one is complete
+        os.replace(tmp_path, self.checkpoint_path)
+        self.logger.debug('Wrote checkpoint after {n:d} datasets to "{path}".', n=self._n_datasets,
+                          path=self.checkpoint_path)
+
+    def resume_checkpoint(self):
+        """Resume from the checkpoint file.
+
+        Restores the iterator position and the state of the histogram fillers.
+        """
+        with open(self.checkpoint_path, 'rb') as f:
+            state = pickle.load(f)
+        if state['paths'] != [str(p) for p in self._paths]:
+            raise RuntimeError('Checkpoint "{}" was written for different input files.'.format(self.checkpoint_path))
+        links = checkpoint_links()
+        for key, link_state in state['links'].items():
+            if key not in links:
+                raise RuntimeError('Link "{}" of checkpoint not found in chains.'.format(':'.join(key)))
+            links[key].restore_checkpoint_state(link_state)
+        if state['chunksize'] is not None:
+            self.set_chunk_size(state['chunksize'])
+        self._n_datasets = state['n_datasets']
+        self._sum_data_length = state['sum_data_length']
+        self._resume_position = self._position = state['position']
+        self.logger.info('Resuming after {n:d} datasets, from file {idx:d} at row {row:d}.',
+                         n=self._n_datasets, idx=self._position[0], row=self._position[1])
+
+    def _restore_position(self, n_paths_opened, file_offset, file_read=False):
+        """Move the file iterator to a position.
+
+        Files that have been read entirely are skipped without reading them.
+
+        :param int n_paths_opened: number of files opened, the last one is read up to file_offset
+        :param int file_offset: number of rows read from the last file
+        :param bool file_read: the last file has been read entirely. Default is False.
         """
+        for _ in range(n_paths_opened if file_read else n_paths_opened - 1):
+            self._pop_path()
+            self._n_paths_opened += 1
+        if file_read:
+            self._file_offset = file_offset
+            return
+        path = self._pop_path() if n_paths_opened > 0 else None
+        if path is None:
+            return
+        self._open_path(path)
+        if not is_chunk_reader(self._reader):
+            # the entire file has been read
+            self._reader = None
+            return
+        # skip the rows read, in steps of chunksize
+        chunksize = self._reader.chunksize
+        remaining = file_offset
+        while remaining > 0:
+            self._reader.chunksize = min(remaining, chunksize)
+            remaining -= len(next(self._reader).index)
+        self._reader.chunksize = chunksize
+        self._file_offset = file_offset
+
+    def _open_path(self, path):
+        """Set up the reader of a new file.
+
+        :param str path: file location
+        """
+        try:
+            self._reader = read_file(path, self.reader, self.reader_kwargs(path), self._cache)
+        except Exception:
+            self.logger.fatal('Could not read from new path "{path}".', path=path)
+            raise
+        self._current_path = path
+        self._n_paths_opened += 1
+        self._file_offset = 0
+        self._n_file_chunks = 0
+        self.logger.info('Opened new file "{path}".', path=self._current_path)
+
+    def _read_next(self):
+        """Read the next dataset: an entire file or a file chunk."""
         data = None
 
         # 1. input file has already been set (in previous cycle),
         #    and this is still used for chunking.
-        if self._reader is not None and isinstance(self._reader, pd.io.parsers.TextFileReader):
+        if self._reader is not None and is_chunk_reader(self._reader):
             try:
                 data = next(self._reader)
                 return data
             except StopIteration:
-                # TextFileReader throws stopiterator exception at end
+                # chunk readers throw stopiterator exception at end
                 data = None
             except Exception:
                 raise Exception('Unexpected error: cannot process next dataset iteration.')
 
         # 2. trying next file
         # data is still None, setting up a new reader
-        if not self._path_itr.finished:
-            path = str(self._path_itr[0])
-            self._path_itr.iternext()
-            try:
-                self._reader = set_reader(path, self.reader, **self.kwargs)
-            except Exception:
-                self.logger.fatal('Could not read from new path "{path}".', path=path)
-                raise
-            self._current_path = path
-            self.logger.info('Opened new file "{path}".', path=self._current_path)
+        path = self._pop_path()
+        if path is not None:
+            self._open_path(path)
         else:
             # no new files left to open
             # (data is still None)
@@ -429,11 +2660,11 @@ class ReadToDf(Link):
             data = self._reader
             # resetting the reader for next itr
             self._reader = None
-        elif isinstance(self._reader, pd.io.parsers.TextFileReader):
+        elif is_chunk_reader(self._reader):
             try:
                 data = next(self._reader)
             except StopIteration:
-                # TextFileReader throws stopiterator exception at end
+                # chunk readers throw stopiterator exception at end
                 data = None
             except Exception:
                 raise Exception('Unexpected error: cannot process next dataset iteration.')
@@ -468,11 +2699,17 @@ class ReadToDf(Link):
         self._config_lock = lock
 
 
-def set_reader(path, reader, *args, **kwargs):
-    """Pick the correct reader.
+def resolve_reader(path, reader):
+    """Get the reader function of a file.
 
     Based on provided reader setting, or based on file extension.
+
+    :param str path: file location
+    :param reader: reader setting, e.g. 'csv' or pd.read_csv; determined from the file extension if None
+    :returns: reader function
     """
+    if not reader and os.path.isfile(os.path.join(path, PARTITION_METADATA)):
+        reader = partitioned_reader
     if not reader:
         reader = all_readers.get(os.path.splitext(path)[1].strip('.'), None)
     if not reader:
@@ -481,13 +2718,200 @@ def set_reader(path, reader, *args, **kwargs):
     logger.debug('Using reader "{reader!s}"', reader=reader)
     # If the reader is input as 'csv' by hand, use the lookup, else use the specified reader (as pd.read_X)
     reader = all_readers.get(reader) if isinstance(reader, str) else reader
+    # pd.read_hdf only iterates over tables; the hdf reader iterates over any DataFrame
+    return hdf_reader if reader == pd.read_hdf else reader
+
+
+def checkpoint_links():
+    """Get the links of all chains that have state to checkpoint.
+
+    These are the histogram fillers that store their histograms at finalize.
+
+    :returns: links by (chain name, link name)
+    :rtype: dict
+    """
+    from eskapade.analysis.histogram_filling import HistogramFillerBase
+    return {(chain.name, link.name): link for chain in process_manager for link in chain
+            if isinstance(link, HistogramFillerBase) and link.store_at_finalize}
+
+
+def set_reader(path, reader, *args, **kwargs):
+    """Pick the correct reader.
+
+    Based on provided reader setting, or based on file extension.
+    """
+    reader = resolve_reader(path, reader)
 
     # kwargs for the numpy and feather readers
     f_type = kwargs.pop('file_type', None)
     restore_index = kwargs.pop('restore_index', True)
+
+    # read only a byte range of a delimited file
+    byte_range = kwargs.pop('byte_range', None)
+    if byte_range is not None:
+        if reader != pd.read_csv:
+            raise RuntimeError('Reading a byte range requires pd.read_csv.')
+        if os.path.splitext(path)[1].strip('.') in COMPRESSED_EXTENSIONS:
+            raise RuntimeError('Cannot read a byte range of compressed file "{}".'.format(path))
+        header_end, begin, end = byte_range
+        path = io.BufferedReader(ByteRangeFile(path, begin, end, header_end))
+
     if reader == numpy_reader:
-        return reader(path, restore_index, f_type)
+        return reader(path, restore_index, f_type, kwargs.get('chunksize'))
+    elif reader in (numpy_columnar_reader, parquet_reader, partitioned_reader):
+        return reader(path, restore_index, **kwargs)
     elif reader == feather_reader:
-        return reader(path, restore_index)
+        return reader(path, restore_index, kwargs.get('chunksize'), kwargs.get('memory_map', False))
+    elif reader in TEXT_PARSERS and kwargs.get('engine') == 'arrow':
+        if reader == pd.read_table and kwargs.get('sep', kwargs.get('delimiter')) is None:
+            kwargs['sep'] = '\t'
+        return arrow_csv_reader(path, *args, **kwargs)
     else:
         return reader(path, *args, **kwargs)
+
+
+def read_file(path, reader, kwargs, cache=None):
+    """Read a file with the appropriate reader, or from the parse cache.
+
+    Chunked reads are not cached.
+
+    :param str path: file location
+    :param reader: reader setting, see set_reader()
+    :param dict kwargs: key word arguments passed on to the reader
+    :param ParseCache cache: parse cache, default is None (no caching)
+    :returns: the dataset, or a chunk reader
+    """
+    if cache is None or kwargs.get('chunksize') is not None:
+        return set_reader(path, reader, **kwargs)
+    key = cache.key(path, reader, kwargs)
+    data = cache.load(key)
+    if data is None:
+        data = set_reader(path, reader, **kwargs)
+        if isinstance(data, pd.DataFrame):
+            cache.store(key, data)
+    else:
+        logger.debug('Loaded file "{path}" from parse cache.', path=path)
+    return data
+
+
+def timed_read(path, reader, kwargs, cache=None):
+    """Read a file with the appropriate reader and time the parsing.
+
+    :param str path: file location
+    :param reader: reader setting, see set_reader()
+    :param dict kwargs: key word arguments passed on to the reader
+    :param ParseCache cache: parse cache, default is None (no caching)
+    :returns: tuple of the dataset and the parse time in seconds
+    :rtype: tuple
+    """
+    start = time.time()
+    data = read_file(path, reader, kwargs, cache)
+    return data, time.time() - start
+
+
+class ParseCache(object):
+    """On-disk cache of parsed files.
+
+    Parsed DataFrames are stored in the columnar numpy format, and read back memory-mapped (copy-on-write).
+    An entry is keyed on the absolute file path, its modification time and size, and the reader settings,
+    so it is no longer used once the file or the settings change.
+    If the total size of the cache exceeds max_bytes, the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir, max_bytes=None):
+        """Initialize parse cache.
+
+        :param str cache_dir: cache directory, created if needed
+        :param int max_bytes: maximum total size of the cache in bytes, default is no limit
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self.max_bytes is not None:
+            self.prune()
+
+    @staticmethod
+    def key(path, reader, kwargs):
+        """Fingerprint of a file and its reader settings.
+
+        :param str path: file location
+        :param reader: reader setting, see set_reader()
+        :param dict kwargs: key word arguments passed on to the reader
+        :returns: cache key
+        :rtype: str
+        """
+        stat = os.stat(path)
+        reader = reader if isinstance(reader, str) or reader is None else \
+            '{}.{}'.format(getattr(reader, '__module__', ''), getattr(reader, '__qualname__', repr(reader)))
+        fingerprint = repr((os.path.abspath(path), stat.st_mtime_ns, stat.st_size, reader,
+                            sorted((k, repr(v)) for k, v in kwargs.items())))
+        return hashlib.sha1(fingerprint.encode()).hexdigest()
+
+    def entry_path(self, key):
+        """Location of a cache entry."""
+        return os.path.join(self.cache_dir, key + '.npcol')
+
+    def load(self, key):
+        """Load DataFrame from cache.
+
+        :param str key: cache key
+        :returns: cached DataFrame, None if not in cache
+        :rtype: pd.DataFrame
+        """
+        path = self.entry_path(key)
+        try:
+            df = numpy_columnar_reader(path, True, mmap_mode='c')
+        except (OSError, ValueError):
+            return None
+        # mark as recently used
+        os.utime(os.path.join(path, COLUMNAR_METADATA))
+        return df
+
+    def store(self, key, df):
+        """Store DataFrame in cache.
+
+        DataFrames that the columnar numpy format cannot represent exactly are not stored,
+        e.g. with a multi-index or a named column index, such that a cache hit returns the parsed frame.
+
+        :param str key: cache key
+        :param pd.DataFrame df: DataFrame to store
+        """
+        path = self.entry_path(key)
+        tmp_path = '{}.tmp{:d}'.format(path, os.getpid())
+        index = df.index
+        store_index = not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1)
+        try:
+            check_columnar_labels(df, store_index)
+            if df.columns.name is not None:
+                raise RuntimeError('The name of the column index is not stored in columnar numpy format.')
+        except RuntimeError as exc:
+            logger.debug('Not storing DataFrame in parse cache: {exc}', exc=exc)
+            return
+        try:
+            numpy_columnar_writer(df, tmp_path, store_index)
+            # write to temporary location first, such that readers never see a partial entry
+            os.replace(tmp_path, path)
+        except Exception as exc:
+            logger.warning('Could not store DataFrame in parse cache: {exc}', exc=exc)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+        if self.max_bytes is not None:
+            self.prune()
+
+    def prune(self):
+        """Remove least recently used entries until the cache size is within max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            metadata = os.path.join(path, COLUMNAR_METADATA)
+            if not name.endswith('.npcol') or not os.path.exists(metadata):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(metadata), size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logger.debug('Removing "{path}" from parse cache.', path=path)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
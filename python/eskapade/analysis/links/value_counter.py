@@ -6,8 +6,8 @@ Created: 2017/03/02
 
 Description:
     Algorithm to do value_counts() on single columns of a pandas
-    dataframe, or groupby().size() on multiple columns, both returned
-    as dictionaries. It is possible to do cleaning of these dicts by
+    dataframe, or count combinations of values of multiple columns,
+    both returned as dictionaries. It is possible to do cleaning of these dicts by
     rejecting certain keys or removing inconsistent data types.
     Numeric and timestamp columns are converted to bin indices before
     the binning is applied.
@@ -24,6 +24,7 @@ LICENSE.
 from collections import Counter
 
 import numpy as np
+import pandas as pd
 
 from eskapade import process_manager, DataStore
 from eskapade.analysis import histogram_filling as hf
@@ -31,15 +32,127 @@ from eskapade.analysis.histogram import Histogram, ValueCounts
 from eskapade.analysis.histogram_filling import HistogramFillerBase
 
 
+class BinCounts(object):
+    """Dense counts of integer bin indices.
+
+    The counts are accumulated with np.bincount in an int64 array, which
+    covers the range of bin indices seen so far, starting at offset.  The
+    array grows when new bin indices appear, up to max_bins bins.
+    """
+
+    def __init__(self, max_bins):
+        """Initialize bin counts.
+
+        :param int max_bins: maximum number of bins of the counts array
+        """
+        self.max_bins = max_bins
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def fill(self, index):
+        """Add bin indices to the counts.
+
+        :param np.ndarray index: int64 bin indices
+        :returns: False if the bin indices do not fit in max_bins bins, in which case nothing is added
+        :rtype: bool
+        """
+        if not len(index):
+            return True
+        low, high = int(index.min()), int(index.max())
+        if len(self.counts):
+            low = min(low, self.offset)
+            high = max(high, self.offset + len(self.counts) - 1)
+        if high - low + 1 > self.max_bins:
+            return False
+
+        # grow array to new range of bin indices
+        if low != self.offset or high - low + 1 != len(self.counts):
+            counts = np.zeros(high - low + 1, dtype=np.int64)
+            counts[self.offset - low:self.offset - low + len(self.counts)] = self.counts
+            self.offset, self.counts = low, counts
+
+        self.counts += np.bincount(index - self.offset, minlength=len(self.counts))
+        return True
+
+    def to_counter(self):
+        """Convert to counts dictionary of the filled bins.
+
+        :returns: counts by bin index
+        :rtype: Counter
+        """
+        filled = np.flatnonzero(self.counts)
+        return Counter(dict(zip((filled + self.offset).tolist(), self.counts[filled].tolist())))
+
+
+class KeyCounts(object):
+    """Counts of combinations of column codes.
+
+    Each combination of codes is encoded as one int64 key, with mixed-radix
+    arithmetic: the radix of a column is its number of distinct values.  The
+    distinct keys and their counts are kept in arrays.  When the number of
+    distinct values of a column grows, the keys are re-encoded.
+    """
+
+    def __init__(self):
+        """Initialize key counts."""
+        self.radices = None
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def fill(self, codes, radices):
+        """Add combinations of codes to the counts.
+
+        :param list codes: int64 code arrays of the columns, without missing values
+        :param tuple radices: number of distinct values of the columns
+        :raises ValueError: if the number of combinations does not fit in an int64 key
+        """
+        keys = np.ravel_multi_index(codes, radices)
+        if self.radices is not None and self.radices != radices:
+            self.keys = np.ravel_multi_index(np.unravel_index(self.keys, self.radices), radices)
+        self.radices = radices
+
+        # count keys: dense if the number of combinations is small compared to the number of keys
+        n_comb = int(np.prod(radices, dtype=object))
+        if n_comb <= max(4 * len(keys), 1024):
+            counts = np.bincount(keys, minlength=n_comb)
+            keys = np.flatnonzero(counts)
+            counts = counts[keys]
+        else:
+            keys, counts = np.unique(keys, return_counts=True)
+
+        # merge with counts so far
+        keys, inverse = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+        self.counts = np.bincount(inverse, np.concatenate([self.counts, counts]), len(keys)).astype(np.int64)
+        self.keys = keys
+
+    def to_counter(self, categories):
+        """Convert to counts dictionary of value tuples.
+
+        :param list categories: values of the codes, as index per column
+        :returns: counts by tuple of values, or by value for a single column
+        :rtype: Counter
+        """
+        if self.radices is None:
+            return Counter()
+        values = [cat.take(c).tolist() for cat, c in zip(categories, np.unravel_index(self.keys, self.radices))]
+        keys = zip(*values) if len(values) > 1 else values[0]
+        return Counter(dict(zip(keys, self.counts.tolist())))
+
+
 class ValueCounter(HistogramFillerBase):
     """Count values in Pandas data frame.
 
     ValueCounter does value_counts() on single columns of a pandas
-    dataframe, or groupby().size() on multiple columns.  Results of both are
-    returned as same-style dictionaries.
+    dataframe, and counts combinations of values of multiple columns.
+    Results of both are returned as same-style dictionaries.
 
     Numeric and timestamp columns are converted to bin indices before the
-    binning is applied.  The binning can be provided as input.
+    binning is applied.  The binning can be provided as input.  The bin
+    indices of single columns are counted in dense arrays with np.bincount.
+    Other single columns and combinations of columns are counted as
+    mixed-radix integer keys of column codes, which are converted to values
+    at storage.  The codes of each column are determined once per dataset,
+    and shared by all column combinations.
 
     It is possible to do cleaning of these dicts by rejecting certain keys
     or removing inconsistent data types.  Results are stored as 1D
@@ -78,6 +191,10 @@ class ValueCounter(HistogramFillerBase):
         >>> drop_keys = {'x': [1, 4, 8, 19],
         >>>              'y': ['apple', 'pear', 'tomato'],
         >>>              'x:y': [(1, 'apple'), (19, 'tomato')]}
+
+        :param int max_dense_bins: maximum number of bins for which single numeric or timestamp columns are counted
+               in a dense array. Columns with a larger range of bin indices are counted in dictionaries.
+               Default is 1000000.
         """
         # initialize Link, pass name from kwargs
         if 'name' not in kwargs:
@@ -90,10 +207,15 @@ class ValueCounter(HistogramFillerBase):
         self._process_kwargs(kwargs,
                              store_key_counts=None,
                              store_key_hists=None,
-                             drop_inconsistent_key_types=True)
+                             drop_inconsistent_key_types=True,
+                             max_dense_bins=1000000)
 
         # these get filled during execution
         self._counts = {}
+        self._bin_counts = {}
+        self._key_counts = {}
+        self._categories = {}
+        self._codes = {}
         self._valcnts = {}
 
     def initialize(self):
@@ -110,6 +232,19 @@ class ValueCounter(HistogramFillerBase):
 
         return HistogramFillerBase.initialize(self)
 
+    def execute(self):
+        """Execute the link.
+
+        Fill the counts of all column combinations, with the codes of each
+        column determined once.
+        """
+        self._codes = {}
+        try:
+            return HistogramFillerBase.execute(self)
+        finally:
+            # release codes of this dataset
+            self._codes = {}
+
     def process_columns(self, df):
         """Process columns before histogram filling.
 
@@ -127,7 +262,7 @@ class ValueCounter(HistogramFillerBase):
         for col in self.dt_cols:
             self.logger.debug('Converting column "{column}" of type "{type}" to nanosec.',
                               column=col, type=self.var_dtype[col])
-            idf[col] = df[col].apply(hf.to_ns)
+            idf[col] = hf.series_to_ns(df[col])
 
         # numerical variables are converted to indices here
         for col in self.num_cols + self.dt_cols:
@@ -140,7 +275,7 @@ class ValueCounter(HistogramFillerBase):
             is_timestamp = isinstance(dt.type(), np.datetime64)
             sf = idf if is_timestamp else df
             bin_specs = self.bin_specs.get(col, self._unit_bin_specs if is_number else self._unit_timestamp_specs)
-            idf[col] = sf[col].apply(hf.value_to_bin_index, **bin_specs)
+            idf[col] = hf.series_to_bin_index(sf[col], **bin_specs)
 
         return idf
 
@@ -154,6 +289,13 @@ class ValueCounter(HistogramFillerBase):
         if name not in self._counts:
             # create an (empty) value counts dict
             self._counts[name] = Counter()
+        # bin indices of single numeric and timestamp columns are counted in a dense array
+        if len(columns) == 1 and columns[0] in self.num_cols + self.dt_cols and \
+                self.fill_bin_counts(name, idf[columns[0]]):
+            return
+        # other columns and combinations of columns are counted as integer keys
+        if self.fill_key_counts(name, idf, columns):
+            return
         # value_counts() is faster than groupby().size(), but only works for series (1d).
         # else use groupby() for multi-dimensions
         g = idf.groupby(by=columns).size() if len(columns) > 1 else idf[columns[0]].value_counts()
@@ -162,6 +304,134 @@ class ValueCounter(HistogramFillerBase):
         counts = self.drop_requested_keys(name, counts)
         self._counts[name].update(counts)
 
+    def fill_bin_counts(self, name, index):
+        """Fill dense counts with bin indices of a column.
+
+        If the range of bin indices becomes too large, the dense counts are
+        moved to the counts dictionary, which is used from then on.
+
+        :param str name: histogram name
+        :param pd.Series index: bin indices
+        :returns: True if the bin indices have been counted
+        :rtype: bool
+        """
+        if name not in self._bin_counts:
+            self._bin_counts[name] = BinCounts(self.max_dense_bins)
+        bin_counts = self._bin_counts[name]
+        if bin_counts is None:
+            return False
+        if bin_counts.fill(index.dropna().to_numpy(dtype=np.int64)):
+            return True
+        self.logger.debug('Range of bin indices of "{name}" exceeds {n:d} bins; using value counts dictionary.',
+                          name=name, n=self.max_dense_bins)
+        self._counts[name].update(self.drop_requested_keys(name, bin_counts.to_counter()))
+        self._bin_counts[name] = None
+        return False
+
+    def column_codes(self, series):
+        """Get codes of the values of a column.
+
+        The codes are consistent over datasets: the values of a column are
+        kept as categories, and new values are appended to them.  Within a
+        dataset, the codes are cached by column.
+
+        :param pd.Series series: input column
+        :returns: int64 codes, -1 for missing values
+        :rtype: np.ndarray
+        """
+        if series.name in self._codes:
+            return self._codes[series.name]
+        codes, uniques = pd.factorize(series)
+        categories = self._categories.get(series.name)
+        if categories is None:
+            categories = uniques
+        else:
+            categories = categories.append(uniques[~uniques.isin(categories)])
+        self._categories[series.name] = categories
+        # code -1 of missing values picks the appended -1
+        mapping = np.append(categories.get_indexer(uniques), -1)
+        self._codes[series.name] = mapping[codes].astype(np.int64)
+        return self._codes[series.name]
+
+    def fill_key_counts(self, name, idf, columns):
+        """Fill counts of combinations of column values.
+
+        Rows with a missing value in one of the columns are not counted.  If
+        the number of combinations becomes too large for an int64 key, the key
+        counts are moved to the counts dictionary, which is used from then on.
+
+        :param str name: histogram name
+        :param idf: input data frame used for filling histogram
+        :param list columns: histogram columns
+        :returns: True if the combinations have been counted
+        :rtype: bool
+        """
+        if name not in self._key_counts:
+            self._key_counts[name] = KeyCounts()
+        key_counts = self._key_counts[name]
+        if key_counts is None:
+            return False
+        codes = [self.column_codes(idf[col]) for col in columns]
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        if not valid.any():
+            return True
+        try:
+            key_counts.fill([c[valid] for c in codes], tuple(len(self._categories[col]) for col in columns))
+            return True
+        except ValueError:
+            pass
+        self.logger.debug('Number of combinations of "{name}" exceeds integer keys; using value counts dictionary.',
+                          name=name)
+        self._counts[name].update(self.drop_requested_keys(name, self.key_counts_to_counter(name)))
+        self._key_counts[name] = None
+        return False
+
+    def key_counts_to_counter(self, name):
+        """Convert key counts of column combination to counts dictionary.
+
+        :param str name: histogram name
+        :returns: counts by tuple of values
+        :rtype: Counter
+        """
+        categories = [self._categories.get(col) for col in name.split(':')]
+        return self._key_counts[name].to_counter(categories)
+
+    def get_counts(self, name):
+        """Get the counts accumulated so far.
+
+        :param str name: histogram name
+        :returns: counts by key
+        :rtype: Counter
+        """
+        counts = Counter(self._counts.get(name, {}))
+        if self._bin_counts.get(name) is not None:
+            counts.update(self.drop_requested_keys(name, self._bin_counts[name].to_counter()))
+        if self._key_counts.get(name) is not None:
+            counts.update(self.drop_requested_keys(name, self.key_counts_to_counter(name)))
+        return counts
+
+    def checkpoint_state(self):
+        """Get the state accumulated over the datasets processed so far.
+
+        Dense counts and key counts are included in the counts dictionaries.
+
+        :returns: accumulated state by attribute name
+        :rtype: dict
+        """
+        state = HistogramFillerBase.checkpoint_state(self)
+        state['_counts'] = dict((name, self.get_counts(name)) for name in self._counts)
+        return state
+
+    def restore_checkpoint_state(self, state):
+        """Restore the state accumulated over datasets from a checkpoint.
+
+        :param dict state: accumulated state by attribute name
+        """
+        self._bin_counts = {}
+        self._key_counts = {}
+        self._categories = {}
+        HistogramFillerBase.restore_checkpoint_state(self, state)
+
     def process_and_store(self):
         """Make, clean, and store ValueCount objects."""
         # nothing to do?
@@ -173,7 +443,7 @@ class ValueCounter(HistogramFillerBase):
         # 1. construct value counts
         for col in self.columns:
             name = ':'.join(col)
-            vc = ValueCounts(col, col, self._counts[name])
+            vc = ValueCounts(col, col, self.get_counts(name))
             # remove all items from Counters where the key is not of correct datatype.
             # e.g. in Counter dict of ints, remove any non-ints that may arise
             # from dq issues.
@@ -203,6 +473,9 @@ class ValueCounter(HistogramFillerBase):
                 bin_specs = self.bin_specs.get(name, self._unit_bin_specs)
             elif is_timestamp:
                 bin_specs = self.bin_specs.get(name, self._unit_timestamp_specs)
+                if 'bin_edges' in bin_specs:
+                    # timestamps are binned in nanoseconds, as are their bin edges
+                    bin_specs = dict(bin_specs, bin_edges=[hf.bin_spec_to_ns(e) for e in bin_specs['bin_edges']])
             h = Histogram(self._valcnts[name], variable=name, datatype=self.var_dtype[name],
                           bin_specs=bin_specs)
             self._hists[name] = h
@@ -17,6 +17,13 @@ LICENSE.
 
 import os
 import copy
+import json
+import queue
+import shutil
+import threading
+import uuid
+from functools import partial
+from urllib.parse import quote
 
 import numpy as np
 import pandas as pd
@@ -80,41 +87,154 @@ def numpy_writer(df, path, store_index):
 def feather_writer(df, path, store_index):
     """Write df to disk in feather format; preserving the metadata
 
+    The dtypes and the index are stored in the metadata of the Arrow schema.
+    The input DataFrame is not modified.
+
     :param DataFrame df: pandas Dataframe to write out
     :param str path: target file location
     :param bool store_index: store index in DataFrame, default is True
     """
-    import feather
+    import pyarrow as pa
+    from pyarrow import feather
     if (store_index is False) and (df.index.dtype not in (np.int_, int)):
         logger.info('The non-numerical index will not be stored')
 
-    if store_index:
-        df.index.name = 'restored_index'
-        df.reset_index(inplace=True)
-
-    dtypes = df.dtypes.values
-    # A column can have type `object` which can hold more than one
-    # fundamental data type, if object we determine the fundamental type
-    obj_cols = df.columns[dtypes == object]
-    fund_dtypes = [
-        type(df.iloc[0, i]).__name__ if col in obj_cols else str(dtypes[i])
-        for i, col in enumerate(df.columns.values)
-    ]
+    # a range index is stored in the schema metadata only
+    table = pa.Table.from_pandas(df, preserve_index=None if store_index else False)
 
-    # The underlying Apache framework doesn't handle numpy dtypes
-    # we convert to strings and create an array of the right shape
-    dtypes_arr = np.zeros(shape=df.shape[0], dtype=np.dtype)
-    dtypes_arr[:df.shape[1]] = fund_dtypes
-    df['_dtypes'] = dtypes_arr.astype(str)
+    # dtypes are stored to restore the ones that are not round-tripped by Arrow
+    dtypes = [str(dt) for dt in df.dtypes.values]
+    metadata = dict(table.schema.metadata or {})
+    metadata[FEATHER_METADATA] = json.dumps(dict(dtypes=dtypes, store_index=bool(store_index))).encode()
+    table = table.replace_schema_metadata(metadata)
 
     logger.debug('Using Feather writer')
-    feather.write_dataframe(df, path)
+    # uncompressed and in a single record batch, such that the columns can be memory-mapped when read back
+    feather.write_feather(table, path, compression='uncompressed', chunksize=max(1, len(df.index)))
+
+
+def parquet_writer(df, path, store_index, **kwargs):
+    """Write df to disk in parquet format; preserving the metadata
+
+    :param DataFrame df: pandas Dataframe to write out
+    :param str path: target file location
+    :param bool store_index: store index in DataFrame, default is True
+    :param kwargs: passed on to pyarrow.parquet.write_table, e.g. row_group_size and compression
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    # a range index is stored in the schema metadata only
+    table = pa.Table.from_pandas(df, preserve_index=None if store_index else False)
+    logger.debug('Using parquet writer')
+    pq.write_table(table, path, **kwargs)
+
+
+def numpy_columnar_writer(df, path, store_index):
+    """Write df to disk in columnar numpy format; preserving the metadata
+
+    The DataFrame is stored in a directory, with one npy file per column
+    and a json file with the column names, dtypes and the index.
+    Columns of fixed-size data types are stored such that they can be
+    memory-mapped when read back.
 
-    # The above reset_index and _dtypes column can propogate back, this remedies that
-    if store_index:
-        df.set_index('restored_index', drop=True, inplace=True)
-        df.index.name = 'index'
-    df.drop(labels=['_dtypes'], axis=1, inplace=True)
+    Column labels and the index name need to be strings, numbers, booleans or None,
+    which are stored in the json file. A MultiIndex is not supported.
+
+    :param DataFrame df: pandas Dataframe to write out
+    :param str path: target directory location
+    :param bool store_index: store index in DataFrame
+    """
+    # if the index is non-numeric we overwrite the default and store
+    store_index = store_index or (df.index.dtype not in (np.int_, int))
+    check_columnar_labels(df, store_index)
+
+    # only overwrite an existing directory if it holds a columnar numpy dataset
+    if os.path.isdir(path):
+        if not os.path.exists(os.path.join(path, COLUMNAR_METADATA)) and os.listdir(path):
+            raise RuntimeError('Directory "{}" is not empty and does not hold a columnar numpy dataset.'.format(path))
+
+    logger.debug('Saving using numpy as columnar directory')
+    # written to a temporary directory first, such that a failed write leaves no incomplete dataset
+    tmp_path = '{}.tmp-{}'.format(os.path.abspath(path), uuid.uuid4().hex)
+    os.makedirs(tmp_path)
+    try:
+        columns = []
+        for i, col in enumerate(df.columns.values):
+            columns.append(dict(name=_json_label(col), **_save_numpy_column(df.iloc[:, i], tmp_path,
+                                                                            'c{:d}'.format(i))))
+        metadata = dict(columns=columns, n_rows=len(df.index), index=None)
+        if store_index:
+            metadata['index'] = dict(name=_json_label(df.index.name),
+                                     **_save_numpy_column(df.index.to_series(), tmp_path, 'index'))
+        with open(os.path.join(tmp_path, COLUMNAR_METADATA), 'w') as f:
+            json.dump(metadata, f)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.rename(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def check_columnar_labels(df, store_index=True):
+    """Check that the column labels and index of df can be stored in columnar numpy format.
+
+    :param DataFrame df: pandas Dataframe to check
+    :param bool store_index: the index is stored
+    :raises RuntimeError: if a label or the index cannot be stored
+    """
+    if isinstance(df.columns, pd.MultiIndex):
+        raise RuntimeError('Columns of type MultiIndex cannot be stored in columnar numpy format.')
+    if store_index and isinstance(df.index, pd.MultiIndex):
+        raise RuntimeError('An index of type MultiIndex cannot be stored in columnar numpy format.')
+    for label in list(df.columns.values) + ([df.index.name] if store_index else []):
+        _json_label(label)
+
+
+def _json_label(label):
+    """Convert a column label or index name to a value that is stored as is in json.
+
+    :param label: column label or index name
+    :returns: label as str, int, float, bool or None
+    :raises RuntimeError: if the label is of another type
+    """
+    if isinstance(label, np.generic):
+        label = label.item()
+    if label is not None and not isinstance(label, (str, int, float, bool)):
+        raise RuntimeError('Label {!r} of type {} cannot be stored in columnar numpy format.'
+                           .format(label, type(label).__name__))
+    return label
+
+
+def _save_numpy_column(series, path, name):
+    """Save a column in its own npy file.
+
+    :param pd.Series series: column to save
+    :param str path: target directory location
+    :param str name: base name of the column file(s)
+    :returns: column metadata
+    :rtype: dict
+    """
+    meta = dict(file=name + '.npy', dtype=str(series.dtype))
+    if pd.api.types.is_categorical_dtype(series.dtype):
+        meta['kind'] = 'category'
+        meta['categories_file'] = name + '_categories.npy'
+        meta['ordered'] = bool(series.cat.ordered)
+        values = series.cat.codes.values
+        np.save(os.path.join(path, meta['categories_file']), series.cat.categories.values, allow_pickle=True)
+    elif pd.api.types.is_datetime64tz_dtype(series.dtype):
+        # stored as utc timestamps
+        meta['kind'] = 'datetimetz'
+        values = series.dt.tz_convert('UTC').dt.tz_localize(None).values
+    elif isinstance(series.dtype, np.dtype) and series.dtype != object:
+        meta['kind'] = 'numpy'
+        values = series.values
+    else:
+        # objects and pandas extension types need pickling, these cannot be memory-mapped
+        meta['kind'] = 'object'
+        values = series.to_numpy(dtype=object)
+    np.save(os.path.join(path, meta['file']), values, allow_pickle=(meta['kind'] == 'object'))
+    return meta
 
 
 all_writers = {'csv': pd.DataFrame.to_csv,
@@ -133,11 +253,364 @@ all_writers = {'csv': pd.DataFrame.to_csv,
                'npy': numpy_writer,
                'npz': numpy_writer,
                'feather': feather_writer,
-               'ft': feather_writer}
+               'ft': feather_writer,
+               'npcol': numpy_columnar_writer,
+               'parquet': parquet_writer,
+               'pq': parquet_writer}
+
+# name of metadata file of columnar numpy dataset
+COLUMNAR_METADATA = '_metadata.json'
+
+# key of eskapade metadata in Arrow schema
+FEATHER_METADATA = b'eskapade'
+
+# name of metadata file of partitioned dataset
+PARTITION_METADATA = '_partitions.json'
+
+# directory name of missing partition values
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
 
 logger = Logger()
 
 
+def write_file(df, path, writer, store_index, kwargs):
+    """Write DataFrame to disk with the appropriate writer.
+
+    :param DataFrame df: pandas Dataframe to write out
+    :param str path: target file location
+    :param writer: writer function, see get_writer()
+    :param bool store_index: store index in DataFrame, for the numpy, feather and parquet writers
+    :param dict kwargs: key word arguments passed on to the pandas and parquet writers
+    """
+    if writer in (numpy_writer, numpy_columnar_writer, feather_writer):
+        writer(df, path, store_index)
+    elif writer == parquet_writer:
+        writer(df, path, store_index, **kwargs)
+    else:
+        writer(df, path, **kwargs)
+
+
+def partition_dir_name(col, value):
+    """Get the name of the directory of a partition, as col=value.
+
+    :param str col: partition column
+    :param value: value of the column in the partition
+    :rtype: str
+    """
+    if pd.isna(value):
+        text = NULL_PARTITION
+    elif isinstance(value, pd.Timestamp) and value.tz is None and value == value.normalize():
+        text = str(value.date())
+    elif isinstance(value, pd.Timestamp):
+        text = value.isoformat()
+    else:
+        text = str(value)
+    return '{}={}'.format(col, quote(text, safe=''))
+
+
+def clear_partitioned_dir(path):
+    """Remove partitioned dataset, before it is written.
+
+    :param str path: directory location
+    :raises RuntimeError: if the directory exists, is not empty and does not hold a partitioned dataset
+    """
+    if not os.path.isdir(path):
+        return
+    if not os.path.exists(os.path.join(path, PARTITION_METADATA)) and os.listdir(path):
+        raise RuntimeError('Directory "{}" is not empty and does not hold a partitioned dataset.'.format(path))
+    shutil.rmtree(path)
+
+
+def partitioned_writer(df, path, partition_cols, writer, part_name, store_index, **kwargs):
+    """Write df to disk as partitioned dataset, adding a file to each partition.
+
+    The rows of each combination of values of the partition columns are written to the file
+    col1=value1/col2=value2/.../part_name in the dataset directory, without the partition columns.
+    The partition columns, their dtypes and the column order are stored in the metadata file of the dataset.
+
+    :param DataFrame df: pandas Dataframe to write out
+    :param str path: target directory location
+    :param list partition_cols: partition columns
+    :param writer: writer of the files, parquet_writer or feather_writer
+    :param str part_name: file name of the new files
+    :param bool store_index: store a non-range index
+    :param kwargs: passed on to the parquet writer
+    """
+    os.makedirs(path, exist_ok=True)
+    store_index = bool(store_index) and not isinstance(df.index, pd.RangeIndex)
+    metadata_path = os.path.join(path, PARTITION_METADATA)
+    if not os.path.exists(metadata_path):
+        metadata = dict(partition_cols=list(partition_cols), columns=[str(c) for c in df.columns],
+                        dtypes={col: str(df[col].dtype) for col in partition_cols},
+                        format='parquet' if writer == parquet_writer else 'feather', store_index=store_index)
+        # forks may write the metadata at the same time
+        tmp_path = '{}.{:d}'.format(metadata_path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(metadata, f)
+        os.replace(tmp_path, metadata_path)
+
+    for values, group in df.groupby(list(partition_cols), dropna=False, sort=False, observed=True):
+        values = values if isinstance(values, tuple) else (values,)
+        folder = os.path.join(path, *(partition_dir_name(col, v) for col, v in zip(partition_cols, values)))
+        os.makedirs(folder, exist_ok=True)
+        group = group.drop(list(partition_cols), axis=1)
+        if not store_index:
+            group = group.reset_index(drop=True)
+        if writer == parquet_writer:
+            writer(group, os.path.join(folder, part_name), store_index, **kwargs)
+        else:
+            writer(group, os.path.join(folder, part_name), store_index)
+
+
+class StreamWriter(object):
+    """Base class of writers that append DataFrames to one open file.
+
+    Subclasses implement _write(), which appends a DataFrame, and close().
+    """
+
+    def __init__(self, path):
+        """Initialize stream writer.
+
+        :param str path: target file location
+        """
+        self.path = path
+        self.n_rows = 0
+
+    def _write(self, df):
+        """Append DataFrame to the file."""
+        raise NotImplementedError('_write() not implemented for {}'.format(self.__class__.__name__))
+
+    def write(self, df):
+        """Append DataFrame to the file.
+
+        :param DataFrame df: pandas Dataframe to append
+        """
+        self._write(df)
+        self.n_rows += len(df.index)
+
+    def close(self):
+        """Close the file."""
+        raise NotImplementedError('close() not implemented for {}'.format(self.__class__.__name__))
+
+
+class CsvStreamWriter(StreamWriter):
+    """Append DataFrames to a delimited text file, with a single header.
+
+    A compressed file, e.g. with extension gz or bz2, consists of one compressed stream per DataFrame.
+    """
+
+    def __init__(self, path, key, store_index, **kwargs):
+        """Open text file.
+
+        :param str path: target file location
+        :param str key: not used
+        :param bool store_index: not used; the index is written unless index=False
+        :param kwargs: passed on to DataFrame.to_csv
+        """
+        super().__init__(path)
+        compression = kwargs.pop('compression', 'infer')
+        if compression is None or isinstance(compression, str):
+            compression = pd.io.common.infer_compression(path, compression)
+        method = compression.get('method') if isinstance(compression, dict) else compression
+        if method in ('zip', 'tar'):
+            raise RuntimeError('Cannot append to {} archive "{}".'.format(method, path))
+        kwargs.pop('mode', None)
+        self.header = kwargs.pop('header', True)
+        self.kwargs = dict(kwargs, compression=compression)
+        self._file = open(path, 'wb')
+
+    def _write(self, df):
+        """Append DataFrame, with the header for the first DataFrame only."""
+        df.to_csv(self._file, header=self.header if self.n_rows == 0 else False, **self.kwargs)
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+
+class HdfStreamWriter(StreamWriter):
+    """Append DataFrames to a table in an HDF5 file.
+
+    The table is stored under the DataStore key. NB the width of string columns is set by the first
+    DataFrame; pass min_itemsize for longer strings later on.
+    """
+
+    def __init__(self, path, key, store_index, complevel=None, complib=None, **kwargs):
+        """Open HDF5 file.
+
+        :param str path: target file location
+        :param str key: key of the table in the file
+        :param bool store_index: not used; the index is always stored
+        :param int complevel: compression level, see pd.HDFStore
+        :param str complib: compression library, see pd.HDFStore
+        :param kwargs: passed on to pd.HDFStore.append, e.g. data_columns and min_itemsize
+        """
+        super().__init__(path)
+        self.key = key
+        kwargs.pop('format', None)
+        kwargs.pop('mode', None)
+        self.kwargs = kwargs
+        self._store = pd.HDFStore(path, mode='w', complevel=complevel, complib=complib)
+
+    def _write(self, df):
+        """Append DataFrame to the table."""
+        self._store.append(self.key, df, format='table', **self.kwargs)
+
+    def close(self):
+        """Close the file."""
+        self._store.close()
+
+
+class ArrowStreamWriter(StreamWriter):
+    """Base class of writers that append DataFrames as Arrow tables.
+
+    The schema is set by the first DataFrame; later DataFrames are converted to it.
+    A range index is not stored, such that the file is read back with a range index over all rows.
+    """
+
+    def __init__(self, path, key, store_index):
+        """Initialize Arrow stream writer.
+
+        :param str path: target file location
+        :param str key: not used
+        :param bool store_index: store a non-range index
+        """
+        super().__init__(path)
+        self.store_index = store_index
+        self.schema = None
+        self._preserve_index = False
+        self._writer = None
+
+    def _open(self, df, table):
+        """Open the file and set the schema, from the first DataFrame and table."""
+        raise NotImplementedError('_open() not implemented for {}'.format(self.__class__.__name__))
+
+    def _write(self, df):
+        """Convert DataFrame to Arrow and append it."""
+        import pyarrow as pa
+        if self._writer is None:
+            self._preserve_index = bool(self.store_index) and not isinstance(df.index, pd.RangeIndex)
+            table = pa.Table.from_pandas(df, preserve_index=self._preserve_index)
+            self._open(df, table)
+        self._write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=self._preserve_index))
+
+    def _write_table(self, table):
+        """Append Arrow table to the file."""
+        self._writer.write_table(table)
+
+    def close(self):
+        """Close the file."""
+        if self._writer is not None:
+            self._writer.close()
+
+
+class ParquetStreamWriter(ArrowStreamWriter):
+    """Append DataFrames to a parquet file, as one or more row groups each."""
+
+    def __init__(self, path, key, store_index, row_group_size=None, **kwargs):
+        """Initialize parquet stream writer.
+
+        :param str path: target file location
+        :param str key: not used
+        :param bool store_index: store a non-range index
+        :param int row_group_size: maximum number of rows per row group
+        :param kwargs: passed on to pyarrow.parquet.ParquetWriter, e.g. compression
+        """
+        super().__init__(path, key, store_index)
+        self.row_group_size = row_group_size
+        self.kwargs = kwargs
+
+    def _open(self, df, table):
+        """Open the file with the schema of the first table."""
+        import pyarrow.parquet as pq
+        self.schema = table.schema
+        self._writer = pq.ParquetWriter(self.path, self.schema, **self.kwargs)
+
+    def _write_table(self, table):
+        """Append Arrow table to the file, as row groups of at most row_group_size rows."""
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+
+
+class FeatherStreamWriter(ArrowStreamWriter):
+    """Append DataFrames to a feather file, as record batches.
+
+    The dtypes of the first DataFrame are stored in the metadata, as done by feather_writer().
+    NB categorical columns need the same categories in all DataFrames.
+    """
+
+    def _open(self, df, table):
+        """Open the file with the schema of the first table, including the eskapade metadata."""
+        import pyarrow as pa
+        metadata = dict(table.schema.metadata or {})
+        metadata[FEATHER_METADATA] = json.dumps(dict(dtypes=[str(dt) for dt in df.dtypes.values],
+                                                     store_index=self._preserve_index)).encode()
+        self.schema = table.schema.with_metadata(metadata)
+        self._writer = pa.ipc.new_file(self.path, self.schema)
+
+
+# writers that append to an open file, by writer function
+stream_writers = {pd.DataFrame.to_csv: CsvStreamWriter,
+                  pd.DataFrame.to_hdf: HdfStreamWriter,
+                  parquet_writer: ParquetStreamWriter,
+                  feather_writer: FeatherStreamWriter}
+
+
+class BackgroundWriter(object):
+    """Write DataFrames to disk in a background thread.
+
+    Write jobs are handed over through a bounded queue: submitting a job blocks while the queue is full,
+    which limits the number of frames held in memory. Jobs are executed in order. After a failed job the
+    remaining jobs are skipped, and the error is raised at the next submit or at close.
+    """
+
+    _END = object()
+
+    def __init__(self, size=1):
+        """Start the background writer thread.
+
+        :param int size: maximum number of pending write jobs. Default is 1.
+        """
+        self._queue = queue.Queue(maxsize=max(1, size))
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='BackgroundWriter', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Execute write jobs until closed."""
+        while True:
+            job = self._queue.get()
+            if job is self._END:
+                return
+            if self._error is None:
+                try:
+                    job()
+                except BaseException as exc:
+                    self._error = exc
+
+    def _raise_error(self):
+        """Raise the error of a failed write job, if any."""
+        if self._error is not None:
+            raise RuntimeError('Writing in background failed: {!s}'.format(self._error)) from self._error
+
+    def submit(self, job):
+        """Submit write job.
+
+        :param job: function without arguments that writes a file
+        :raises RuntimeError: if a previous job has failed
+        """
+        self._raise_error()
+        self._queue.put(job)
+
+    def close(self):
+        """Wait until all jobs have been executed, and stop the background thread.
+
+        :raises RuntimeError: if a job has failed
+        """
+        self._queue.put(self._END)
+        self._thread.join()
+        self._raise_error()
+
+
 class WriteFromDf(Link):
     """Write a DataFrame from the DataStore to disk."""
 
@@ -159,10 +632,14 @@ class WriteFromDf(Link):
         }
 
         To use feather specify: {'feather', 'ft'} \
+        To use the columnar numpy writer, which stores a directory with one \
+        npy file per column that can be memory-mapped when read back, specify: {'npcol'} \
+        To use parquet specify: {'parquet', 'pq'}; kwargs such as row_group_size and \
+        compression are passed on to pyarrow.parquet.write_table. \
         If writer is not passed the path must contain a known file \
-        extension. Valid numpy extensions {'npy', 'npz'} or feather {'ft'}
+        extension. Valid numpy extensions {'npy', 'npz', 'npcol'}, feather {'ft'} or parquet {'parquet', 'pq'}
 
-        :note: the numpy and feather writers will preserve the \
+        :note: the numpy, columnar numpy and feather writers will preserve the \
         metadata such as dtypes for each column and the index \
         if non numeric.
         :param dict dictionary: keys (as in the arg above) and paths (as in the arg above) \
@@ -171,6 +648,27 @@ class WriteFromDf(Link):
         Useful when running in loops. Default is false.
         :param bool store_index: whether the index should be stored as \
         metadata. Default is False unless the index is non-numeric
+        :param bool async_write: write the files in a background thread, such that the chain does not wait \
+        for the disk. The write errors are raised at the next execute or at finalize, which waits until \
+        all files have been written. Not supported in forked processing, where files are written directly. \
+        Default is false.
+        :param int queue_size: maximum number of dataframes waiting to be written in the background; \
+        execute blocks while the queue is full. Default is 2.
+        :param bool snapshot: with async_write, write a (deep) copy of the dataframe, such that later \
+        in-place changes do not end up in the file. If false, the dataframe is handed over to the writer, \
+        and should not be changed in place by later links or iterations. Default is true.
+        :param bool append: keep one file open per key, and append the dataframe of every execute, e.g. every \
+        chunk in a loop. The files are closed at finalize. Supported by the csv writer (header written once), \
+        the HDF5 writer (appending to a table with the DataStore key as name), and the parquet (row groups) \
+        and feather (record batches) writers; for these the dtypes are set by the first dataframe. \
+        Not supported in forked processing, where a file is written per fork and execute, as with \
+        add_counter_to_name. Default is false.
+        :param list partition_cols: write a partitioned dataset: path is a directory, with a subdirectory \
+        col=value per value of the first partition column, and so on, holding the rows with these values. \
+        Every execute, e.g. every chunk in a loop, adds a file part-N to each partition it has rows for. \
+        The files are written in parquet format, or in feather format with writer 'feather'. \
+        An existing partitioned dataset at path is removed at initialize. ReadToDf reads the dataset back, \
+        and skips the partitions that do not pass its filters. Default is None (no partitioning).
         :param kwargs: all other key word arguments are passed on to the pandas writers.
         """
         # initialize Link, pass name from kwargs
@@ -178,13 +676,16 @@ class WriteFromDf(Link):
 
         # process and register all relevant kwargs. kwargs are added as attributes of the link.
         # second arg is default value for an attribute. key is popped from kwargs.
-        self._process_kwargs(kwargs, path='', key='', writer=None, dictionary={}, add_counter_to_name=False)
+        self._process_kwargs(kwargs, path='', key='', writer=None, dictionary={}, add_counter_to_name=False,
+                             async_write=False, queue_size=2, snapshot=True, append=False, partition_cols=None)
 
         # pass on remaining kwargs to pandas writer
         self.kwargs = copy.deepcopy(kwargs)
 
         # execute counter
         self._counter = 0
+        self._background = None
+        self._streams = {}
         return
 
     def initialize(self):
@@ -208,6 +709,22 @@ class WriteFromDf(Link):
                                   key=k, new_key=self.path_map[k])
 
 
+        assert isinstance(self.queue_size, int) and self.queue_size > 0, 'queue_size needs to be set to positive integer.'
+        if self.partition_cols:
+            if isinstance(self.partition_cols, str):
+                self.partition_cols = [self.partition_cols]
+            assert not self.append and not self.add_counter_to_name, \
+                'partition_cols cannot be combined with append or add_counter_to_name.'
+            for p in self.path_map.values():
+                if self.partitioned_writer(p) not in (parquet_writer, feather_writer):
+                    raise RuntimeError('Partitioned datasets are written in parquet or feather format.')
+                clear_partitioned_dir(p)
+        if self.append:
+            assert not self.add_counter_to_name, 'append cannot be combined with add_counter_to_name.'
+            for p in self.path_map.values():
+                if get_writer(p, self.writer) not in stream_writers:
+                    raise RuntimeError('Appending is not supported by the writer of file "{}".'.format(p))
+
         self.logger.info('kwargs passed on to pandas writer are: {kwargs}.', kwargs=self.kwargs)
 
         return StatusCode.Success
@@ -230,6 +747,21 @@ class WriteFromDf(Link):
         # Kwarg for numpy and feather writers
         self.store_index = self.kwargs.pop('store_index', True)
 
+        # start the background writer at first call, i.e. after a possible fork
+        if self.async_write and self._background is None:
+            if settings.get('fork', False):
+                self.logger.warning('Writing in background is not supported in forked processing; writing directly.')
+                self.async_write = False
+            else:
+                self.logger.debug('Writing up to {n:d} dataframes in background.', n=self.queue_size)
+                self._background = BackgroundWriter(self.queue_size)
+
+        # the forks cannot close their files, as they skip finalize
+        if self.append and settings.get('fork', False):
+            self.logger.warning('Appending is not supported in forked processing; writing a file per execute.')
+            self.append = False
+            self.add_counter_to_name = True
+
         # collect writer and store the dataframes
         for k, path in self.path_map.items():
             df = ds[k]
@@ -242,21 +774,67 @@ class WriteFromDf(Link):
                 # updated path
                 ps = os.path.splitext(path)
                 path = ps[0] + fi_str + ex_str + ps[1]
-            writer = get_writer(path, self.writer)
+            writer = get_writer(path, self.writer) if not self.partition_cols else self.partitioned_writer(path)
             folder = os.path.dirname(path)
             persistence.create_dir(folder)
             self.logger.debug('Checking for directory <{dir}>.', dir=folder)
             if not os.path.exists(folder):
                 self.logger.fatal('Path given is invalid.')
-            self.logger.info('Writing file "{path}".', path=path)
-            if writer == numpy_writer or writer == feather_writer:
-                writer(df, path, self.store_index)
+            if self.partition_cols:
+                # name of the files added to the partitions
+                part_name = 'part-{:d}'.format(self._counter) if not settings.get('fork', False) else \
+                    'part-f{:d}-{:d}'.format(settings['fork_index'], self._counter)
+                part_name += '.parquet' if writer == parquet_writer else '.ft'
+                write = partial(partitioned_writer, path=path, partition_cols=self.partition_cols, writer=writer,
+                                part_name=part_name, store_index=self.store_index, **self.kwargs)
+            elif self.append:
+                if k not in self._streams:
+                    self._streams[k] = stream_writers[writer](path, k, self.store_index, **self.kwargs)
+                write = self._streams[k].write
             else:
-                writer(df, path, **self.kwargs)
+                write = partial(write_file, path=path, writer=writer, store_index=self.store_index,
+                                kwargs=self.kwargs)
+            if self._background is not None:
+                self.logger.info('Queueing dataframe for file "{path}".', path=path)
+                self._background.submit(partial(write, df.copy() if self.snapshot else df))
+            else:
+                self.logger.info('Writing dataframe to file "{path}".', path=path)
+                write(df)
 
         self._counter += 1
         return StatusCode.Success
 
+    def partitioned_writer(self, path):
+        """Get the writer of the files of a partitioned dataset.
+
+        Parquet, unless set otherwise by writer or by the extension of the directory.
+
+        :param str path: directory location
+        :returns: writer function
+        """
+        if self.writer or os.path.splitext(path)[1].strip('.') in all_writers:
+            return get_writer(path, self.writer)
+        return parquet_writer
+
+    def finalize(self):
+        """Finalize the link.
+
+        Wait until the files queued for writing in background have been written, and close the files
+        appended to.
+        """
+        try:
+            if self._background is not None:
+                background, self._background = self._background, None
+                background.close()
+                self.logger.debug('Finished writing in background.')
+        finally:
+            for stream in self._streams.values():
+                stream.close()
+                self.logger.info('Closed file "{path}" with {n:d} records.', path=stream.path, n=stream.n_rows)
+            self._streams = {}
+
+        return StatusCode.Success
+
 
 def get_writer(path, writer, *args, **kwargs):
     """Pick the correct writer.
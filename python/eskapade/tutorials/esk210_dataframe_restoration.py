@@ -252,6 +252,12 @@ if settings['do_feather']:
     #        whether to store the index in the metadata. Default is
     #        False when the index is numeric, True otherwise.
 
+    #  memory_map : bool
+    #        memory-map the file, such that numeric columns without
+    #        missing values are not copied. These columns are read-only:
+    #        changing the dataframe in place raises an error.
+    #        Default is False, which reads the columns into memory.
+
     fw = Chain('feather_writer')
     fw.add(
         ReadToDf(
@@ -39,18 +39,18 @@ TEST_REQUIREMENTS = ['pytest>=3.5.0',
 REQUIREMENTS = [
     'Eskapade-Core>=1.0.0',
     'matplotlib>=2.0.2',
-    'numpy>=1.15.0',
+    'numpy>=1.19.0',
     'scipy>=0.19.0',
     'scikit-learn>=0.20.1',
     'statsmodels>=0.8.0',
-    'pandas>=0.20.1',
+    'pandas>=1.3.0',
     'tabulate>=0.8.2',
     'sortedcontainers>=1.5.7',
     'histogrammar>=1.0.9',
     'names>=0.3.0',
     'fastnumbers>=2.0.2',
     'phik>=0.9.3',
-    'feather-format>=0.4.0'
+    'pyarrow>=3.0.0'
     ]
 
 REQUIREMENTS = REQUIREMENTS + TEST_REQUIREMENTS
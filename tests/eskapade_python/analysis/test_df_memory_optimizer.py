@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eskapade import process_manager, resources, ConfigObject, DataStore, StatusCode
+from eskapade.analysis import DfMemoryOptimizer, ReadToDf
+from eskapade.analysis.links.df_memory_optimizer import MemoryOptimizer, smallest_int_type
+
+
+class DfMemoryOptimizerTest(unittest.TestCase):
+    """Tests of memory optimization of dataframes"""
+
+    def setUp(self):
+        n = 100
+        self.df = pd.DataFrame({'small': np.arange(n), 'neg': np.arange(n) - 1000,
+                                'half': np.arange(n) / 2, 'third': np.arange(n) / 3,
+                                'cat': ['a', 'b', 'c', None] * (n // 4),
+                                'uniq': ['s{:d}'.format(i) for i in range(n)]})
+
+    def tearDown(self):
+        from escore.core import execution
+        execution.reset_eskapade()
+
+    def test_smallest_int_type(self):
+        self.assertEqual(smallest_int_type(0, 255), np.uint8)
+        self.assertEqual(smallest_int_type(0, 256), np.uint16)
+        self.assertEqual(smallest_int_type(-1, 127), np.int8)
+        self.assertEqual(smallest_int_type(-2 ** 40, 0), np.int64)
+
+    def test_link(self):
+        ds = process_manager.service(DataStore)
+        ds['data'] = self.df
+        link = DfMemoryOptimizer(read_key='data', store_key='optimized')
+        link.initialize()
+        self.assertEqual(link.execute(), StatusCode.Success)
+
+        df = ds['optimized']
+        self.assertDictEqual({c: str(dt) for c, dt in df.dtypes.items()},
+                             {'small': 'uint8', 'neg': 'int16', 'half': 'float32', 'third': 'float64',
+                              'cat': 'category', 'uniq': 'object'})
+        pd.testing.assert_frame_equal(df.astype(self.df.dtypes), self.df)
+        # input is left unchanged
+        self.assertEqual(self.df['small'].dtype, np.int64)
+        savings = ds['memory_savings_optimized']
+        self.assertEqual(savings['small'], 7 * len(self.df.index))
+        self.assertEqual(savings['uniq'], 0)
+
+    def test_fixed_schema(self):
+        optimizer = MemoryOptimizer()
+        first, _ = optimizer.optimize(self.df.iloc[:50])
+        # second chunk with wider range and new category
+        df = self.df.iloc[50:].copy()
+        df.loc[60, 'small'] = 1000
+        df.loc[61, 'cat'] = 'd'
+        df.loc[62, 'half'] = 0.1
+        second, _ = optimizer.optimize(df)
+        self.assertEqual(second['small'].dtype, np.uint16)
+        self.assertEqual(second['half'].dtype, np.float64)
+        self.assertListEqual(list(second['cat'].cat.categories), ['a', 'b', 'c', 'd'])
+        self.assertListEqual(list(second['cat'].iloc[10:12]), ['a', 'd'])
+        self.assertEqual(second['neg'].dtype, first['neg'].dtype)
+
+    def test_read_chunks(self):
+        ds = process_manager.service(DataStore)
+        settings = process_manager.service(ConfigObject)
+        link = ReadToDf(name='reader', key='data', path=resources.fixture('dummy.csv'), sep='|', chunksize=5,
+                        optimize_memory=dict(max_category_fraction=1.))
+        link.initialize()
+        chunks = []
+        while link.execute() != StatusCode.BreakChain:
+            chunks.append(ds['data'])
+            if not settings['chainRepeatRequestBy_reader']:
+                break
+        # all chunks have the dtypes of the first chunk
+        for chunk in chunks[1:]:
+            pd.testing.assert_series_equal(chunk.dtypes, chunks[0].dtypes)
+        self.assertEqual(str(chunks[0]['x'].dtype), 'uint8')
+        self.assertEqual(str(chunks[0]['loc'].dtype), 'string')
+        self.assertEqual(str(pd.concat(chunks)['x'].dtype), 'uint8')
+        self.assertIn('memory_savings_data', ds)
@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eskapade.analysis import histogram_filling as hf
+from eskapade.analysis.histogram import Histogram
+
+
+class HistogramFillingTest(unittest.TestCase):
+    """Tests for the helper functions of histogram filling"""
+
+    def test_series_to_ns(self):
+        """Test the vectorized conversion of timestamps to nanoseconds"""
+        columns = [pd.Series(pd.to_datetime(['2020-01-01', None, '2021-03-04 05:06'])),
+                   pd.Series(pd.date_range('2020-01-01', periods=3, tz='Europe/Amsterdam')),
+                   pd.Series(['2020-01-01', None, '2020-02-03T04:05'], dtype=object),
+                   pd.Series([pd.Timestamp('2020-01-01', tz='UTC'), pd.Timestamp('2020-01-01', tz='Europe/Amsterdam'),
+                              None], dtype=object)]
+        for col in columns:
+            ns = hf.series_to_ns(col)
+            self.assertListEqual(ns.tolist(), col.apply(hf.to_ns).tolist())
+            self.assertTrue(ns.index.equals(col.index))
+        self.assertEqual(hf.series_to_ns(columns[0])[1], 0)
+
+    def test_series_to_bin_index(self):
+        """Test the vectorized conversion of numbers and timestamps to bin indices"""
+        x = pd.Series(np.random.RandomState(42).normal(size=1000) * 10)
+        for bin_specs in ({}, {'bin_width': 0.3, 'bin_offset': -0.1}):
+            index = hf.series_to_bin_index(x, **bin_specs)
+            self.assertEqual(index.dtype, np.int64)
+            self.assertListEqual(index.tolist(), x.apply(hf.value_to_bin_index, **bin_specs).tolist())
+
+        # bin edges, with missing values
+        bin_edges = [0, 2, 3, 4, 5, 7, 8]
+        x = pd.Series([-1, 0, 1.5, 2, 7.9, 8, 9, np.nan, np.inf])
+        index = hf.series_to_bin_index(x, bin_edges=bin_edges)
+        h = Histogram(([1] * 6, bin_edges), variable='x')
+        self.assertListEqual(index[:7].tolist(), [h.value_to_bin_label(v) for v in x[:7]])
+        self.assertListEqual(index.isna().tolist(), [False] * 7 + [True] * 2)
+
+        # timestamps in nanoseconds, with bin specifications in time units
+        ns = hf.series_to_ns(pd.Series(pd.to_datetime(['2010-01-04', '2010-03-10', '2009-12-31'])))
+        index = hf.series_to_bin_index(ns, bin_width=np.timedelta64(30, 'D'), bin_offset=np.datetime64('2010-01-04'))
+        self.assertListEqual(index.tolist(), [0, 2, -1])
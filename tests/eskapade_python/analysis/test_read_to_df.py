@@ -0,0 +1,557 @@
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock as mock
+
+import numpy as np
+import pandas as pd
+
+from eskapade import process_manager, resources, ConfigObject, DataStore, StatusCode
+from eskapade.analysis import ReadToDf
+
+
+class ReadToDfTest(unittest.TestCase):
+    """Tests of ReadToDf reading options"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_path = resources.fixture('dummy.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        from escore.core import execution
+        execution.reset_eskapade()
+
+    def run_loop(self, link, max_iter=1000):
+        """Mimic the chain repeater: execute link until it no longer requests a repeat"""
+        settings = process_manager.service(ConfigObject)
+        ds = process_manager.service(DataStore)
+        lengths = []
+        for _ in range(max_iter):
+            status = link.execute()
+            if status == StatusCode.BreakChain:
+                break
+            lengths.append(ds['n_' + link.key])
+            if not settings['chainRepeatRequestBy_' + link.name]:
+                break
+        link.finalize()
+        return lengths
+
+    def test_prefetch(self):
+        for kwargs in [dict(chunksize=5), dict(itr_over_files=True), dict(chunksize=4)]:
+            lengths = []
+            for n_prefetch in (0, 2):
+                link = ReadToDf(name='reader', key='data', path=[self.data_path] * 3, sep='|', reader='csv',
+                                n_prefetch=n_prefetch, **kwargs)
+                link.initialize()
+                lengths.append(self.run_loop(link))
+                self.assertEqual(link.sum_data_length(), 36)
+                self.assertTrue(link.is_finished())
+            self.assertListEqual(lengths[0], lengths[1])
+
+    def test_prefetch_read_error(self):
+        path = os.path.join(self.tmp_dir, 'data.unknown')
+        with open(path, 'w') as f:
+            f.write('a\n1\n')
+        link = ReadToDf(name='reader', key='data', path=[self.data_path, path], sep='|', itr_over_files=True,
+                        n_prefetch=1)
+        link.initialize()
+        link.execute()
+        with self.assertRaises(RuntimeError):
+            link.execute()
+        link.finalize()
+
+    def test_n_workers(self):
+        paths = [resources.fixture(f) for f in ('dummy.csv', 'dummy1.csv', 'dummy2.csv')]
+        expected = pd.concat(pd.read_csv(p, sep='|') for p in paths)
+        for worker_type in ('thread', 'process'):
+            link = ReadToDf(name='reader', key='data', path=paths, sep='|', n_workers=3, worker_type=worker_type)
+            link.initialize()
+            link.execute()
+            ds = process_manager.service(DataStore)
+            pd.testing.assert_frame_equal(ds['data'], expected)
+            self.assertEqual(ds['n_data'], len(expected.index))
+
+    def test_fork_byte_range(self):
+        from escore import ForkStore
+        settings = process_manager.service(ConfigObject)
+        ds = process_manager.service(DataStore)
+        expected = pd.read_csv(self.data_path, sep='|')
+        for n_fork in (1, 3, 20):
+            process_manager.service(ForkStore)['n_fork'] = n_fork
+            parts = []
+            for fidx in range(n_fork):
+                settings['fork'] = True
+                settings['fork_index'] = fidx
+                link = ReadToDf(name='reader', key='data', path=self.data_path, sep='|', fork_mode='byte_range')
+                link.initialize()
+                link.execute()
+                if ds['n_data'] > 0:
+                    parts.append(ds['data'])
+            del settings['fork']
+            df = pd.concat(parts, ignore_index=True)
+            pd.testing.assert_frame_equal(df, expected)
+
+    def test_fork_byte_range_leading_lines(self):
+        from escore import ForkStore
+        settings = process_manager.service(ConfigObject)
+        ds = process_manager.service(DataStore)
+        path = os.path.join(self.tmp_dir, 'data.csv')
+        with open(path, 'w') as f:
+            f.write('# exported data\n\n# columns:\na,b\nunit_a,unit_b\n')
+            f.writelines('{0},{0}\n'.format(i) for i in range(30))
+        # skipped rows, header rows below skipped rows, and commented and blank lines before the header
+        for kwargs in (dict(skiprows=4), dict(skiprows=[0, 1, 2], header=1), dict(comment='#', header=1)):
+            expected = pd.read_csv(path, **kwargs)
+            self.assertEqual(len(expected.index), 30)
+            process_manager.service(ForkStore)['n_fork'] = 3
+            parts = []
+            for fidx in range(3):
+                settings['fork'] = True
+                settings['fork_index'] = fidx
+                link = ReadToDf(name='reader', key='data', path=path, fork_mode='byte_range', **kwargs)
+                link.initialize()
+                link.execute()
+                parts.append(ds['data'])
+            del settings['fork']
+            pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), expected)
+            self.assertTrue(all(len(p.index) > 0 for p in parts))
+
+        # skipped rows in the body cannot be split into byte ranges
+        link = ReadToDf(name='reader', key='data', path=path, fork_mode='byte_range', skiprows=[0, 10])
+        self.assertRaises(AssertionError, link.initialize)
+
+    def test_balanced_file_bins(self):
+        from eskapade.analysis.links.read_to_df import balanced_file_bins
+        paths = []
+        for i, n in enumerate([100, 10, 10, 10, 60, 30, 10]):
+            paths.append(os.path.join(self.tmp_dir, 'f{:d}.csv'.format(i)))
+            with open(paths[-1], 'w') as f:
+                f.write('x' * n)
+        bins = balanced_file_bins(paths, 3)
+        self.assertListEqual(bins[0], paths[:1])
+        self.assertListEqual(bins[1], [paths[4], paths[6]])
+        self.assertListEqual(bins[2], [paths[1], paths[2], paths[3], paths[5]])
+        # more bins than files
+        bins = balanced_file_bins(paths[:2], 3)
+        self.assertListEqual(bins, [paths[:1], paths[1:2], []])
+
+    def test_fork_queue(self):
+        from escore import ForkStore
+        settings = process_manager.service(ConfigObject)
+        ds = process_manager.service(DataStore)
+        process_manager.service(ForkStore)['n_fork'] = 2
+        paths = [resources.fixture(f) for f in ('dummy.csv', 'dummy1.csv', 'dummy2.csv')]
+        settings['fork'] = True
+        links = []
+        for fidx in range(2):
+            settings['fork_index'] = fidx
+            link = ReadToDf(name='reader', key='data', path=paths, sep='|', itr_over_files=True, fork_mode='queue')
+            link.initialize()
+            link.configure_paths(lock=True)
+            links.append(link)
+        # forks take turns in pulling files from the queue
+        opened = []
+        while not all(link.is_finished() for link in links):
+            for link in links:
+                if link.execute() != StatusCode.BreakChain:
+                    opened.append(link._current_path)
+        del settings['fork']
+        self.assertListEqual(sorted(opened), sorted(paths))
+        self.assertEqual(sum(link.sum_data_length() for link in links), 24)
+
+    def test_chunks_other_formats(self):
+        from eskapade.analysis.links.write_from_df import feather_writer, numpy_columnar_writer
+        df = pd.read_csv(self.data_path, sep='|')
+        numeric = df.select_dtypes('number')
+        paths = [os.path.join(self.tmp_dir, 'data.' + ext) for ext in ('ft', 'npcol', 'npz', 'jsonl')]
+        feather_writer(df, paths[0], False)
+        numpy_columnar_writer(df, paths[1], False)
+        np.savez(paths[2], values=numeric.values, columns=numeric.columns.values,
+                 dtypes=np.array([str(dt) for dt in numeric.dtypes]))
+        df.drop('date', axis=1).to_json(paths[3], orient='records', lines=True)
+        try:
+            import tables
+            paths.append(os.path.join(self.tmp_dir, 'data.h5'))
+            df.to_hdf(paths[-1], 'data')
+        except ImportError:
+            pass
+        ds = process_manager.service(DataStore)
+        for path in paths:
+            expected = numeric if path.endswith('npz') else df.drop('date', axis=1) if path.endswith('jsonl') else df
+            link = ReadToDf(name='reader', key='data', path=[path] * 2, chunksize=5)
+            link.initialize()
+            chunks = []
+            lengths = []
+            settings = process_manager.service(ConfigObject)
+            while link.execute() != StatusCode.BreakChain:
+                chunks.append(ds['data'])
+                lengths.append(ds['n_data'])
+                if not settings['chainRepeatRequestBy_reader']:
+                    break
+            self.assertListEqual(lengths, [5, 5, 2] * 2, msg=path)
+            self.assertTrue(link.is_finished())
+            pd.testing.assert_frame_equal(pd.concat(chunks[:3]), expected)
+
+    def test_target_chunk_bytes(self):
+        df = pd.read_csv(self.data_path, sep='|')
+        target = int(df.memory_usage(deep=True).sum() / 2)
+        for n_prefetch in (0, 2):
+            link = ReadToDf(name='reader', key='data', path=[self.data_path] * 3, sep='|', chunksize=2,
+                            target_chunk_bytes=target, n_prefetch=n_prefetch)
+            link.initialize()
+            lengths = self.run_loop(link)
+            # the chunksize is adapted to the budget of about half a file after the first chunk
+            self.assertEqual(lengths[0], 2)
+            self.assertTrue(4 <= lengths[1] <= 6)
+            self.assertTrue(4 <= link.chunksize <= 6)
+            self.assertEqual(link.sum_data_length(), 36)
+            self.assertTrue(link.is_finished())
+
+        # without chunksize: iterate, starting with chunks of 1000 rows
+        process_manager.service(ConfigObject)['chainRepeatRequestBy_reader'] = False
+        link = ReadToDf(name='reader', key='data', path=[self.data_path] * 3, sep='|', target_chunk_bytes=target)
+        link.initialize()
+        self.assertEqual(link.chunksize, 1000)
+        lengths = self.run_loop(link)
+        self.assertEqual(lengths[0], 12)
+        self.assertTrue(4 <= lengths[1] <= 6)
+        self.assertEqual(link.sum_data_length(), 36)
+        link = ReadToDf(name='reader', key='data', path=self.data_path, sep='|', target_chunk_bytes=0)
+        self.assertRaises(AssertionError, link.initialize)
+
+    def test_parse_cache(self):
+        from unittest import mock
+        from eskapade.analysis.links import read_to_df
+        cache_dir = os.path.join(self.tmp_dir, 'cache')
+        path = os.path.join(self.tmp_dir, 'data.csv')
+        shutil.copy(self.data_path, path)
+        ds = process_manager.service(DataStore)
+
+        def read(**kwargs):
+            link = ReadToDf(key='data', path=path, sep='|', cache_dir=cache_dir, **kwargs)
+            link.initialize()
+            with mock.patch.object(read_to_df, 'set_reader', wraps=read_to_df.set_reader) as parser:
+                link.execute()
+            return ds['data'], parser.call_count
+
+        df, n_parsed = read()
+        self.assertEqual(n_parsed, 1)
+        df_cached, n_parsed = read()
+        self.assertEqual(n_parsed, 0)
+        pd.testing.assert_frame_equal(df_cached, df)
+        # different reader settings, or a modified file, are parsed again
+        df_index, n_parsed = read(index_col='dummy')
+        self.assertEqual(n_parsed, 1)
+        pd.testing.assert_frame_equal(read(index_col='dummy')[0], df_index)
+        with open(path, 'a') as f:
+            f.write('new|2009-01-10|a|1|2\n')
+        df, n_parsed = read()
+        self.assertEqual(n_parsed, 1)
+        self.assertEqual(len(df.index), 13)
+        self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+        # least recently used entries are removed beyond the maximum cache size
+        read(cache_max_bytes=1)
+        self.assertEqual(len(os.listdir(cache_dir)), 0)
+
+        # a cache hit returns the parsed frame; frames that cannot be stored exactly are not cached
+        cache = read_to_df.ParseCache(cache_dir)
+        for kwargs, cached in [(dict(header=None, skiprows=1), True), (dict(index_col='date', parse_dates=True), True),
+                               (dict(index_col=['dummy', 'loc']), False), (dict(header=[0, 1]), False)]:
+            kwargs['sep'] = '|'
+            with mock.patch.object(read_to_df.logger, 'warning') as warning:
+                parsed = read_to_df.read_file(path, None, kwargs, cache)
+            warning.assert_not_called()
+            self.assertEqual(os.path.exists(cache.entry_path(cache.key(path, None, kwargs))), cached, msg=kwargs)
+            pd.testing.assert_frame_equal(read_to_df.read_file(path, None, kwargs, cache), parsed)
+
+    def test_lock_schema(self):
+        path = os.path.join(self.tmp_dir, 'data.csv')
+        with open(path, 'w') as f:
+            f.write('a,b,date\n')
+            f.write(''.join(',{:d},2010-01-0{:d}\n'.format(i, i + 1) for i in range(5)))
+            f.write(''.join('x,{:d},2010-02-0{:d}\n'.format(i, i + 1) for i in range(5)))
+        ds = process_manager.service(DataStore)
+        settings = process_manager.service(ConfigObject)
+
+        def read(**kwargs):
+            link = ReadToDf(name='reader', key='data', path=path, chunksize=5, **kwargs)
+            link.initialize()
+            chunks = []
+            while link.execute() != StatusCode.BreakChain:
+                chunks.append(ds['data'])
+                if not settings['chainRepeatRequestBy_reader']:
+                    break
+            return chunks
+
+        # without lock, the dtype of column a differs per chunk
+        chunks = read()
+        self.assertNotEqual(chunks[0]['a'].dtype, chunks[1]['a'].dtype)
+
+        chunks = read(lock_schema=True, schema_sample_rows=5, parse_dates=['date'])
+        for chunk in chunks:
+            self.assertListEqual([str(dt) for dt in chunk.dtypes[1:]], ['Int64', 'datetime64[ns]'])
+        self.assertListEqual(list(chunks[1]['a']), ['x'] * 5)
+        self.assertDictEqual({c: str(dt) for c, dt in ds['schema_data'].items()},
+                             {'a': 'object', 'b': 'Int64', 'date': 'datetime64[ns]'})
+
+        # explicit dtypes take precedence
+        chunks = read(lock_schema=True, schema_sample_rows=5, dtype={'b': float})
+        self.assertEqual(chunks[1]['b'].dtype, np.float64)
+
+        # missing integers and values of empty columns beyond the sample
+        with open(path, 'w') as f:
+            f.write('a,b,c\n')
+            f.write(''.join(',{:d},True\n'.format(i) for i in range(5)))
+            f.write(''.join('{:d},,\n'.format(i) for i in range(5)))
+            f.write(''.join('{:d},{:d},False\n'.format(i, i) for i in range(5)))
+        for engine in ('c', 'arrow'):
+            chunks = read(lock_schema=True, schema_sample_rows=5, engine=engine)
+            # column a is locked once it has values; arrow streams it with the type of the first block
+            a_dtype = 'Int64' if engine == 'c' else 'float64'
+            self.assertListEqual([str(dt) for dt in chunks[0].dtypes[1:]], ['Int64', 'boolean'])
+            for chunk in chunks[1:]:
+                self.assertListEqual([str(dt) for dt in chunk.dtypes], [a_dtype, 'Int64', 'boolean'])
+            df = pd.concat(chunks, ignore_index=True)
+            self.assertListEqual(df['b'].isna().tolist(), [False] * 5 + [True] * 5 + [False] * 5)
+            self.assertListEqual(list(df['a'].iloc[5:]), list(range(5)) * 2)
+
+    def test_query_set(self):
+        from eskapade.analysis.links.read_to_df import query_predicates, query_columns
+        self.assertListEqual(query_predicates(['x > 2 and 5 >= y', '(loc in ["a", "b"]) & (x != y)', 'x < @v']),
+                             [('x', '>', 2), ('y', '<=', 5), ('loc', 'in', ['a', 'b'])])
+        self.assertListEqual(query_predicates(['x > 2 or y < 5']), [])
+        self.assertListEqual(query_predicates(['x == [1, 5]', '["a"] != loc', 'x < [1, 5]']),
+                             [('x', 'in', [1, 5]), ('loc', 'not in', ['a'])])
+        self.assertListEqual(query_columns(['x > 2 and loc == "a"']), ['x', 'loc'])
+        self.assertIsNone(query_columns(['x < @v']))
+
+        df = pd.read_csv(self.data_path, sep='|')
+        paths = [self.data_path]
+        df.to_parquet(os.path.join(self.tmp_dir, 'data.parquet'), row_group_size=4)
+        paths.append(os.path.join(self.tmp_dir, 'data.parquet'))
+        try:
+            import tables
+            df.to_hdf(os.path.join(self.tmp_dir, 'data.h5'), 'data', format='table', data_columns=['x'])
+            paths.append(os.path.join(self.tmp_dir, 'data.h5'))
+        except ImportError:
+            pass
+        query_set = ['x >= 3', 'loc != "c"', 'y != [2, 4]']
+        expected = df.query(query_set[0]).query(query_set[1]).query(query_set[2])[['dummy', 'y']]
+
+        ds = process_manager.service(DataStore)
+        for path in paths:
+            kwargs = dict(sep='|') if path.endswith('csv') else {}
+            # chunks are counted before the selection
+            link = ReadToDf(name='reader', key='data', path=path, chunksize=4, query_set=query_set,
+                            select_columns=['dummy', 'y'], **kwargs)
+            link.initialize()
+            reader_kwargs = link.reader_kwargs(path)
+            columns = reader_kwargs.get('usecols', reader_kwargs.get('columns'))
+            self.assertListEqual(sorted(getattr(columns, 'names', columns)), ['dummy', 'loc', 'x', 'y'])
+            chunks = []
+            settings = process_manager.service(ConfigObject)
+            while link.execute() != StatusCode.BreakChain:
+                chunks.append(ds['data'])
+                if not settings['chainRepeatRequestBy_reader']:
+                    break
+            self.assertTrue(link.is_finished())
+            pd.testing.assert_frame_equal(pd.concat(chunks), expected, check_index_type=False, obj=path)
+
+            # without iterating
+            link = ReadToDf(name='reader', key='data', path=path, query_set=query_set,
+                            select_columns=['dummy', 'y'], **kwargs)
+            link.initialize()
+            link.execute()
+            pd.testing.assert_frame_equal(ds['data'], expected, check_index_type=False, obj=path)
+
+        # index and date columns are read along with the selected columns
+        for kwargs in (dict(parse_dates=['date']), dict(index_col='dummy', parse_dates=['date'], engine='arrow'),
+                       dict(lock_schema=True, chunksize=4)):
+            settings['chainRepeatRequestBy_reader'] = False
+            link = ReadToDf(name='reader', key='data', path=self.data_path, sep='|', select_columns=['x'], **kwargs)
+            link.initialize()
+            chunks = []
+            while link.execute() != StatusCode.BreakChain:
+                chunks.append(ds['data'])
+                if not settings['chainRepeatRequestBy_reader']:
+                    break
+            expected = pd.read_csv(self.data_path, sep='|', index_col=kwargs.get('index_col'))[['x']]
+            pd.testing.assert_frame_equal(pd.concat(chunks), expected, check_index_type=False,
+                                          check_dtype=not kwargs.get('lock_schema'))
+
+    def test_query_set_nulls(self):
+        # a row group of 1s with a missing value passes a != 1, as in pandas
+        df = pd.DataFrame({'a': [1, np.nan, 1, 2, 1, 1], 'b': ['x', None, 'x', 'y', 'x', 'x']})
+        path = os.path.join(self.tmp_dir, 'data.parquet')
+        df.to_parquet(path, row_group_size=3)
+        ds = process_manager.service(DataStore)
+        settings = process_manager.service(ConfigObject)
+        for query in ('a != 1', 'a != [1]', 'b != "x"', 'b not in ["x"]'):
+            expected = df.query(query)
+            for chunksize in (None, 2):
+                settings['chainRepeatRequestBy_reader'] = False
+                link = ReadToDf(name='reader', key='data', path=path, query_set=[query], chunksize=chunksize)
+                link.initialize()
+                chunks = []
+                while link.execute() != StatusCode.BreakChain:
+                    chunks.append(ds['data'])
+                    if not settings['chainRepeatRequestBy_reader']:
+                        break
+                pd.testing.assert_frame_equal(pd.concat(chunks), expected, check_index_type=False, obj=query)
+
+    def test_batching(self):
+        paths = [resources.fixture(f) for f in ('dummy.csv', 'dummy1.csv', 'dummy2.csv')] * 3
+        for n_prefetch in (0, 2):
+            link = ReadToDf(name='reader', key='data', path=paths, sep='|', itr_over_files=True, batch_rows=20,
+                            n_prefetch=n_prefetch)
+            link.initialize()
+            # files of 12, 5 and 7 rows
+            self.assertListEqual(self.run_loop(link), [24, 24, 24])
+            self.assertEqual(link.sum_data_length(), 72)
+            self.assertTrue(link.is_finished())
+
+        link = ReadToDf(name='reader', key='data', path=paths, sep='|', itr_over_files=True, batch_rows=20,
+                        batch_bytes=1)
+        link.initialize()
+        self.assertListEqual(self.run_loop(link), [12, 5, 7] * 3)
+
+    def test_checkpoint_resume(self):
+        from eskapade import Chain
+        from eskapade.analysis import ValueCounter
+        paths = [resources.fixture(f) for f in ('dummy.csv', 'dummy1.csv', 'dummy2.csv')]
+        checkpoint = os.path.join(self.tmp_dir, 'checkpoint.pkl')
+
+        def run(n_max, **kwargs):
+            """Run reader and value counter over chunks, stopping after n_max chunks as if crashed"""
+            process_manager.reset()
+            ds = process_manager.service(DataStore)
+            settings = process_manager.service(ConfigObject)
+            chain = Chain('chain')
+            kwargs.setdefault('chunksize', 2)
+            kwargs.setdefault('checkpoint_every', 2)
+            reader = ReadToDf(name='reader', key='data', path=paths, sep='|', checkpoint_path=checkpoint, **kwargs)
+            counter = ValueCounter(name='counter', read_key='data', store_key_counts='counts', columns=['x'],
+                                   store_at_finalize=True)
+            for link in (reader, counter):
+                chain.add(link)
+                link.initialize()
+            lengths = []
+            for _ in range(n_max):
+                if reader.execute() == StatusCode.BreakChain:
+                    break
+                lengths.append(ds['n_data'])
+                counter.execute()
+                if not settings['chainRepeatRequestBy_reader']:
+                    break
+            else:
+                return lengths, reader, None
+            reader.finalize()
+            counter.finalize()
+            return lengths, reader, ds['counts']['x']
+
+        full, _, expected = run(100)
+        self.assertFalse(os.path.exists(checkpoint))
+        # crash after 7 chunks; the checkpoint holds the first 6
+        run(7)
+        self.assertTrue(os.path.exists(checkpoint))
+        for n_prefetch in (0, 1):
+            lengths, reader, counts = run(100, resume=True, n_prefetch=n_prefetch)
+            self.assertListEqual(lengths, full[6:])
+            self.assertEqual(reader.sum_data_length(), 24)
+            self.assertDictEqual(dict(counts.counts), dict(expected.counts))
+            # completed run removes the checkpoint
+            self.assertFalse(os.path.exists(checkpoint))
+            run(7)
+
+        # whole files: resuming skips the files read without opening them again
+        os.remove(checkpoint)
+        whole_files = dict(chunksize=None, itr_over_files=True, checkpoint_every=1)
+        full, _, expected = run(100, **whole_files)
+        # crash after 2 files; the checkpoint holds the first one
+        run(2, **whole_files)
+        for n_prefetch in (0, 1):
+            with mock.patch.object(ReadToDf, '_open_path', autospec=True, side_effect=ReadToDf._open_path) as m:
+                lengths, reader, counts = run(100, resume=True, n_prefetch=n_prefetch, **whole_files)
+            self.assertListEqual(lengths, full[1:])
+            self.assertListEqual([c[0][1] for c in m.call_args_list], paths[1:])
+            self.assertDictEqual(dict(counts.counts), dict(expected.counts))
+            run(2, **whole_files)
+
+    def test_io_metrics(self):
+        paths = [resources.fixture(f) for f in ('dummy.csv', 'dummy1.csv', 'dummy2.csv')]
+        ds = process_manager.service(DataStore)
+
+        # chunks: bytes consumed per chunk add up to the file sizes
+        link = ReadToDf(name='reader', key='data', path=paths, sep='|', chunksize=5, io_metrics_key='metrics')
+        link.initialize()
+        self.run_loop(link)
+        metrics = ds['metrics']
+        self.assertListEqual(list(metrics.columns), ['path', 'chunk', 'rows', 'bytes_read', 'parse_seconds',
+                                                     'rows_per_second', 'memory_bytes'])
+        self.assertListEqual(metrics['rows'].tolist(), [5, 5, 2, 5, 5, 2])
+        self.assertListEqual(metrics['chunk'].tolist(), [0, 1, 2, 0, 0, 1])
+        for path, n_bytes in metrics.groupby('path')['bytes_read'].sum().items():
+            self.assertEqual(n_bytes, os.path.getsize(path))
+        self.assertTrue((metrics['memory_bytes'] > 0).all())
+
+        # whole files, not iterating
+        process_manager.reset()
+        ds = process_manager.service(DataStore)
+        link = ReadToDf(name='reader', key='data', path=paths, sep='|', io_metrics_key='metrics')
+        link.initialize()
+        link.execute()
+        link.finalize()
+        metrics = ds['metrics']
+        self.assertListEqual(metrics['rows'].tolist(), [12, 5, 7])
+        self.assertListEqual(metrics['bytes_read'].tolist(), [os.path.getsize(p) for p in paths])
+
+    def test_arrow_engine(self):
+        paths = [resources.fixture(f) for f in ('dummy.csv', 'dummy1.csv', 'dummy2.csv')]
+        ds = process_manager.service(DataStore)
+        expected = pd.concat([pd.read_csv(p, sep='|', parse_dates=['date']) for p in paths])
+
+        link = ReadToDf(name='reader', key='data', path=paths, sep='|', engine='arrow', parse_dates=['date'])
+        link.initialize()
+        link.execute()
+        pd.testing.assert_frame_equal(ds['data'], expected)
+
+        # streamed in small blocks, re-sliced into chunks
+        for lock_schema in (False, True):
+            link = ReadToDf(name='reader', key='data', path=paths, sep='|', engine='arrow', parse_dates=['date'],
+                            chunksize=5, block_size=64, lock_schema=lock_schema)
+            link.initialize()
+            chunks = []
+            settings = process_manager.service(ConfigObject)
+            while link.execute() != StatusCode.BreakChain:
+                chunks.append(ds['data'])
+                if not settings['chainRepeatRequestBy_reader']:
+                    break
+            self.assertListEqual([len(c.index) for c in chunks], [5, 5, 2, 5, 5, 2])
+            # the locked integer columns are nullable
+            locked = expected.astype({c: 'Int64' for c in expected.select_dtypes('int64')}) if lock_schema else expected
+            pd.testing.assert_frame_equal(pd.concat(chunks).reset_index(drop=True), locked.reset_index(drop=True))
+
+        # mapped pandas options
+        link = ReadToDf(name='reader', key='data', path=paths[0], sep='|', engine='arrow', usecols=['dummy', 'x'],
+                        index_col='dummy', dtype={'x': 'category'}, nrows=4)
+        link.initialize()
+        link.execute()
+        pd.testing.assert_frame_equal(ds['data'], pd.read_csv(paths[0], sep='|', usecols=['dummy', 'x'],
+                                                              index_col='dummy', dtype={'x': 'category'}, nrows=4))
+
+        # missing values and empty columns, as with the pandas parser
+        path = os.path.join(self.tmp_dir, 'data.csv')
+        with open(path, 'w') as f:
+            f.write('a,b,c\n1,,NA\n2,,x\n')
+        for kwargs in ({}, {'keep_default_na': False}, {'keep_default_na': False, 'na_values': ['x']}):
+            link = ReadToDf(name='reader', key='data', path=path, engine='arrow', **kwargs)
+            link.initialize()
+            link.execute()
+            pd.testing.assert_frame_equal(ds['data'], pd.read_csv(path, **kwargs))
+
+        link = ReadToDf(name='reader', key='data', path=paths[0], sep='|', engine='arrow', thousands=',')
+        link.initialize()
+        self.assertRaises(RuntimeError, link.execute)
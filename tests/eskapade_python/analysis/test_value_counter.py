@@ -0,0 +1,115 @@
+import datetime
+import unittest
+import unittest.mock as mock
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from eskapade import process_manager, DataStore
+from eskapade.analysis import ValueCounter
+
+
+class ValueCounterTest(unittest.TestCase):
+    """Tests of ValueCounter filling"""
+
+    def setUp(self):
+        rng = np.random.RandomState(42)
+        n = 1000
+        self.df = pd.DataFrame({'x': rng.normal(size=n) * 10,
+                                'i': rng.randint(-50, 50, size=n),
+                                's': rng.choice(['a', 'b', 'c'], size=n),
+                                't': pd.Timestamp('2017-01-01') + pd.to_timedelta(rng.randint(0, 1000, size=n), 'D')})
+        self.df.loc[::7, 'x'] = np.nan
+
+    def tearDown(self):
+        from escore.core import execution
+        execution.reset_eskapade()
+
+    def fill(self, chunks, **kwargs):
+        """Run value counter over chunks of data and return the value counts"""
+        ds = process_manager.service(DataStore)
+        counter = ValueCounter(name='counter', read_key='data', store_key_counts='counts', store_at_finalize=True,
+                               **kwargs)
+        counter.initialize()
+        for chunk in chunks:
+            ds['data'] = chunk
+            counter.execute()
+        counter.finalize()
+        return counter, ds['counts']
+
+    def test_dense_counts(self):
+        """Test counting of bin indices in dense arrays"""
+        columns = ['x', 'i', 's', 't']
+        bin_specs = {'x': {'bin_width': 0.5}, 'i': {'bin_edges': [-10, 0, 5, 10]}}
+        drop_keys = {'x': [0]}
+        # chunks sorted by x, such that the range of bin indices grows on both sides
+        df = self.df.iloc[np.argsort(np.abs(self.df['x'].values))]
+        # reference: counts dictionaries only
+        _, expected = self.fill([self.df], columns=list(columns), bin_specs=bin_specs, drop_keys=drop_keys,
+                                max_dense_bins=0)
+        counter, counts = self.fill(np.array_split(df, 10), columns=list(columns), bin_specs=bin_specs,
+                                    drop_keys=drop_keys)
+        self.assertEqual(counter._bin_counts['x'].offset, int(np.floor(self.df['x'].min() / 0.5)))
+        for col in columns:
+            self.assertDictEqual(dict(counts[col].counts), dict(expected[col].counts))
+        x_index = np.floor(self.df['x'].dropna() / 0.5).astype(int)
+        self.assertDictEqual(dict(counts['x'].counts), {(k,): v for k, v in Counter(x_index).items() if k != 0})
+        self.assertEqual(sum(counts['t'].counts.values()), len(self.df.index))
+
+        # range of bin indices too large: continue with counts dictionary
+        counter, counts = self.fill(np.array_split(df, 10), columns=['x'], bin_specs=bin_specs, drop_keys=drop_keys,
+                                    max_dense_bins=20)
+        self.assertIsNone(counter._bin_counts['x'])
+        self.assertDictEqual(dict(counts['x'].counts), dict(expected['x'].counts))
+
+    def test_key_counts(self):
+        """Test counting of combinations of columns as integer keys"""
+        columns = [['x', 's'], ['s', 'i', 't']]
+        bin_specs = {'x': {'bin_width': 5}}
+        df = self.df.copy()
+        df.loc[::11, 's'] = None
+        # chunks sorted by x, such that new values appear in later chunks
+        chunks = np.array_split(df.iloc[np.argsort(df['x'].values)], 7)
+        _, counts = self.fill(chunks, columns=[list(c) for c in columns], bin_specs=bin_specs,
+                              drop_keys={'x:s': [(0, 'a')]})
+
+        # reference: groupby of bin indices, without missing values
+        idf = pd.DataFrame({'x': np.floor(df['x'] / 5), 's': df['s'], 'i': df['i'],
+                            't': np.floor((df['t'] - pd.Timestamp('2010-01-04')) / pd.Timedelta(days=30))})
+        for c in columns:
+            expected = idf.groupby(c).size().to_dict()
+            if c == ['x', 's']:
+                del expected[(0, 'a')]
+            self.assertDictEqual(dict(counts[':'.join(c)].counts), expected)
+
+    @mock.patch('eskapade.analysis.links.value_counter.pd.factorize', wraps=pd.factorize)
+    def test_shared_codes(self, mock_factorize):
+        """Test that the codes of each column are shared by all column combinations"""
+        df = self.df.copy()
+        df['u'] = df['s'].str.upper()
+        columns = ['s', 'u', 'i', 't']
+        pairs = [[a, b] for a in columns for b in columns if a < b]
+        chunks = np.array_split(df, 3)
+        _, counts = self.fill(chunks, columns=[['s'], ['u']] + pairs)
+        # one factorization per column and dataset
+        self.assertEqual(mock_factorize.call_count, len(columns) * len(chunks))
+
+        self.assertDictEqual(dict(counts['s'].counts), {(k,): v for k, v in df['s'].value_counts().items()})
+        idf = pd.DataFrame({'s': df['s'], 'u': df['u'], 'i': df['i'],
+                            't': np.floor((df['t'] - pd.Timestamp('2010-01-04')) / pd.Timedelta(days=30))})
+        for c in pairs:
+            self.assertDictEqual(dict(counts[':'.join(c)].counts), idf.groupby(c).size().to_dict())
+
+    def test_timestamp_bin_edges(self):
+        """Test histograms of timestamps binned with timestamp edges"""
+        edges = [pd.Timestamp('2016-12-01'), np.datetime64('2017-06-01'), datetime.date(2018, 1, 1),
+                 pd.Timestamp('2020-01-01')]
+        ds = process_manager.service(DataStore)
+        _, counts = self.fill([self.df], columns=['t'], bin_specs={'t': {'bin_edges': edges}},
+                              store_key_hists='hists')
+        expected = pd.cut(self.df['t'], pd.to_datetime(edges), right=False).cat.codes.value_counts()
+        self.assertDictEqual(dict(counts['t'].counts), {(k,): v for k, v in expected.items()})
+        h = ds['hists']['t']
+        self.assertListEqual(h.get_bin_edges(), [pd.Timestamp(e).value for e in edges])
+        self.assertListEqual([h.get_bin_count(i) for i in range(3)], [expected[i] for i in range(3)])
@@ -0,0 +1,239 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock as mock
+
+import numpy as np
+import pandas as pd
+
+from eskapade import process_manager, DataStore
+from eskapade.analysis import ReadToDf, WriteFromDf
+
+
+class WriteFromDfTest(unittest.TestCase):
+    """Tests of WriteFromDf writers, read back with ReadToDf"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        n = 10
+        self.df = pd.DataFrame({'i': np.arange(n, dtype=np.int32),
+                                'f': np.linspace(0, 1, n),
+                                'b': np.arange(n) % 2 == 0,
+                                's': ['s{:d}'.format(i) for i in range(n)],
+                                'c': pd.Categorical(['a', 'b'] * (n // 2)),
+                                't': pd.date_range('2010-01-01', periods=n),
+                                'tz': pd.date_range('2010-01-01', periods=n, tz='Europe/Amsterdam')},
+                               index=pd.Index(['r{:d}'.format(i) for i in range(n)], name='rows'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        from escore.core import execution
+        execution.reset_eskapade()
+
+    def write_and_read(self, path, read_kwargs=None, **write_kwargs):
+        ds = process_manager.service(DataStore)
+        ds['data'] = self.df
+        writer = WriteFromDf(key='data', path=path, **write_kwargs)
+        writer.initialize()
+        writer.execute()
+        writer.finalize()
+        reader = ReadToDf(key='reloaded', path=path, **(read_kwargs or {}))
+        reader.initialize()
+        reader.execute()
+        reader.finalize()
+        return ds['reloaded']
+
+    def test_numpy_columnar(self):
+        path = os.path.join(self.tmp_dir, 'data.npcol')
+        df = self.write_and_read(path)
+        pd.testing.assert_frame_equal(df, self.df)
+        # numeric columns are memory-mapped
+        self.assertIsInstance(df['f'].values, np.memmap)
+        self.assertEqual(sorted(os.listdir(path))[0], '_metadata.json')
+
+        # overwrite existing dataset
+        df = self.write_and_read(path, read_kwargs=dict(restore_index=False))
+        pd.testing.assert_frame_equal(df.drop('restored_index', axis=1), self.df.reset_index(drop=True))
+
+    def test_numpy_columnar_labels(self):
+        from eskapade.analysis.links.write_from_df import numpy_columnar_writer
+        path = os.path.join(self.tmp_dir, 'data.npcol')
+        # non-string column labels and index name
+        self.df = pd.DataFrame(np.arange(12).reshape(4, 3), index=pd.Index([3, 1, 4, 1], name=np.int64(7)))
+        self.df[2.5] = ['a', 'b', 'c', 'd']
+        df = self.write_and_read(path)
+        pd.testing.assert_frame_equal(df, self.df)
+        self.assertListEqual(list(df.columns), [0, 1, 2, 2.5])
+
+        # a multi-index cannot be stored; a failed write leaves the existing dataset untouched
+        multi_columns = pd.MultiIndex.from_product([['x', 'y'], [0, 1]])
+        for df in (self.df.set_index([0, 1]), self.df.set_axis(multi_columns, axis=1),
+                   self.df.rename(columns={0: pd.Timestamp('2020-01-01')})):
+            self.assertRaises(RuntimeError, numpy_columnar_writer, df, path, True)
+            self.assertListEqual(os.listdir(self.tmp_dir), ['data.npcol'])
+        with mock.patch('eskapade.analysis.links.write_from_df._save_numpy_column', side_effect=OSError('disk full')):
+            self.assertRaises(OSError, numpy_columnar_writer, self.df, path, True)
+        self.assertListEqual(os.listdir(self.tmp_dir), ['data.npcol'])
+        pd.testing.assert_frame_equal(self.write_and_read(path), self.df)
+
+    def test_unrestored_index_position(self):
+        # the index is read back as first column in all formats, also in chunks
+        self.df = self.df[['i', 'f']]
+        expected = ['restored_index', 'i', 'f']
+        for ext, chunksize in [(ext, n) for ext in ('npcol', 'ft', 'parquet') for n in (None, 4)] + [('npz', 4)]:
+            path = os.path.join(self.tmp_dir, 'data.' + ext)
+            df = self.write_and_read(path, read_kwargs=dict(restore_index=False, chunksize=chunksize))
+            self.assertListEqual(list(df.columns), expected, msg=ext)
+
+    def test_feather(self):
+        self.df['bytes'] = np.array([b'abc'] * len(self.df.index), dtype='S3')
+        orig = self.df.copy()
+        path = os.path.join(self.tmp_dir, 'data.ft')
+        df = self.write_and_read(path)
+        pd.testing.assert_frame_equal(df, self.df)
+        # the input dataframe has not been modified
+        pd.testing.assert_frame_equal(self.df, orig)
+        self.assertEqual(self.df.index.name, 'rows')
+        # by default the dataframe can be changed in place
+        df.loc[df.index[0], 'f'] = 5
+        self.assertEqual(df['f'].iloc[0], 5)
+
+        # memory-mapped: numeric columns are read-only views of the file
+        df = self.write_and_read(path, read_kwargs=dict(memory_map=True))
+        pd.testing.assert_frame_equal(df, self.df)
+        self.assertFalse(df['f'].values.flags.owndata)
+        self.assertFalse(df['f'].values.flags.writeable)
+
+        df = self.write_and_read(path, read_kwargs=dict(restore_index=False))
+        pd.testing.assert_frame_equal(df.drop('restored_index', axis=1), self.df.reset_index(drop=True))
+
+    def test_feather_chunks_streamed(self):
+        import pyarrow as pa
+        from eskapade.analysis.links.read_to_df import feather_reader
+        self.df = pd.DataFrame({'f': np.arange(100000, dtype=float)})
+        path = os.path.join(self.tmp_dir, 'data.ft')
+        self.write_and_read(path)
+        for memory_map in (False, True):
+            allocated = pa.total_allocated_bytes()
+            # the file is not loaded into memory when opened
+            reader = feather_reader(path, True, chunksize=1000, memory_map=memory_map)
+            self.assertLess(pa.total_allocated_bytes() - allocated, 100000)
+            chunk = next(iter(reader))
+            pd.testing.assert_frame_equal(chunk, self.df.iloc[:1000])
+            # chunks are copied, unless memory-mapped
+            self.assertEqual(chunk['f'].values.flags.writeable, not memory_map)
+
+    def test_parquet(self):
+        path = os.path.join(self.tmp_dir, 'data.parquet')
+        df = self.write_and_read(path, row_group_size=4)
+        pd.testing.assert_frame_equal(df, self.df)
+
+        # projection and filter pushdown
+        df = self.write_and_read(path, read_kwargs=dict(columns=['i', 's'], filters=[('i', '>=', 5)]),
+                                 row_group_size=4)
+        pd.testing.assert_frame_equal(df, self.df[['i', 's']][self.df['i'] >= 5])
+
+    def test_parquet_chunks(self):
+        from eskapade.analysis.links.read_to_df import parquet_reader, parquet_row_groups, normalize_filters
+        import pyarrow.parquet as pq
+        path = os.path.join(self.tmp_dir, 'data.pq')
+        self.write_and_read(path, store_index=False, row_group_size=4)
+        chunks = list(parquet_reader(path, True, chunksize=3))
+        self.assertListEqual([len(c.index) for c in chunks], [3, 3, 3, 1])
+        pd.testing.assert_frame_equal(pd.concat(chunks), self.df.reset_index(drop=True))
+
+        # row groups that cannot pass the filter are skipped
+        filters = normalize_filters([[('i', '<', 2)], [('s', 'in', ['s9'])]])
+        self.assertListEqual(parquet_row_groups(pq.ParquetFile(path), filters), [0, 2])
+        chunks = list(parquet_reader(path, True, columns=['f'], filters=filters, chunksize=2))
+        self.assertListEqual([len(c.index) for c in chunks], [2, 1])
+        self.assertListEqual(list(chunks[0].columns), ['f'])
+
+    def test_async_write(self):
+        ds = process_manager.service(DataStore)
+        path = os.path.join(self.tmp_dir, 'data.pq')
+        writer = WriteFromDf(key='data', path=path, add_counter_to_name=True, async_write=True, queue_size=1)
+        writer.initialize()
+        df = self.df.copy()
+        for i in range(3):
+            df['i'] = i
+            df['f'] = self.df['f']
+            ds['data'] = df
+            writer.execute()
+            # in-place change after handing over the frame
+            df.loc[:, 'f'] = -1.
+        writer.finalize()
+        for i in range(3):
+            written = pd.read_parquet(os.path.join(self.tmp_dir, 'data_p{:d}.pq'.format(i)))
+            self.assertTrue((written['i'] == i).all())
+            self.assertListEqual(written['f'].tolist(), self.df['f'].tolist())
+
+        # write errors are raised at finalize
+        def failing_writer(df, path, **kwargs):
+            raise IOError('disk full')
+        writer = WriteFromDf(key='data', path=path, writer=failing_writer, async_write=True)
+        writer.initialize()
+        writer.execute()
+        self.assertRaises(RuntimeError, writer.finalize)
+
+    def test_append(self):
+        ds = process_manager.service(DataStore)
+        chunks = [self.df.iloc[:4], self.df.iloc[4:7], self.df.iloc[7:]]
+        for ext in ('csv', 'csv.gz', 'h5', 'pq', 'ft'):
+            for async_write in (False, True):
+                path = os.path.join(self.tmp_dir, 'data.' + ext)
+                writer = WriteFromDf(key='data', path=path, writer=ext[:3], append=True, async_write=async_write)
+                writer.initialize()
+                for chunk in chunks:
+                    ds['data'] = chunk
+                    writer.execute()
+                writer.finalize()
+                self.assertListEqual(os.listdir(self.tmp_dir), ['data.' + ext])
+                if ext.startswith('csv'):
+                    # one header
+                    pd.testing.assert_frame_equal(pd.read_csv(path), pd.read_csv(io.StringIO(self.df.to_csv())))
+                else:
+                    reader = ReadToDf(key='reloaded', path=path)
+                    reader.initialize()
+                    reader.execute()
+                    pd.testing.assert_frame_equal(ds['reloaded'], self.df, check_freq=False)
+                os.remove(path)
+
+        writer = WriteFromDf(key='data', path=os.path.join(self.tmp_dir, 'data.npz'), append=True)
+        self.assertRaises(RuntimeError, writer.initialize)
+
+    def test_partitioned(self):
+        from eskapade.analysis.links.read_to_df import PartitionedChunkReader, partitioned_reader
+        ds = process_manager.service(DataStore)
+        df = self.df.reset_index(drop=True)
+        df['r'] = ['n', 's', None, 'n', 's'] * 2
+        path = os.path.join(self.tmp_dir, 'data')
+        for writer in (None, 'feather'):
+            link = WriteFromDf(key='data', path=path, writer=writer, partition_cols=['b', 'r'])
+            link.initialize()
+            # partitions accumulate over the chunks
+            for chunk in (df.iloc[:6], df.iloc[6:]):
+                ds['data'] = chunk
+                link.execute()
+            link.finalize()
+            ext = 'ft' if writer else 'parquet'
+            self.assertListEqual(sorted(os.listdir(os.path.join(path, 'b=True', 'r=n'))),
+                                 ['part-0.' + ext, 'part-1.' + ext])
+            self.assertTrue(os.path.isdir(os.path.join(path, 'b=False', 'r=__HIVE_DEFAULT_PARTITION__')))
+
+            reader = ReadToDf(key='reloaded', path=path)
+            reader.initialize()
+            reader.execute()
+            pd.testing.assert_frame_equal(ds['reloaded'].sort_values('i').reset_index(drop=True), df,
+                                          check_freq=False)
+
+            # partitions are pruned
+            filters = [[('b', '==', True), ('i', '>', 2)], [('r', '==', 's'), ('f', '<', 0.5)]]
+            self.assertEqual(len(PartitionedChunkReader(path, None).files), 9)
+            self.assertEqual(len(PartitionedChunkReader(path, None, filters=filters).files), 7)
+            chunks = list(partitioned_reader(path, True, filters=filters, chunksize=3))
+            expected = df[(df['b'] & (df['i'] > 2)) | ((df['r'] == 's') & (df['f'] < 0.5))]
+            self.assertListEqual([len(c.index) for c in chunks], [3, 1])
+            self.assertListEqual(sorted(pd.concat(chunks)['i']), sorted(expected['i']))